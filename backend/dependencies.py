@@ -1,23 +1,42 @@
 # dependencies.py
+import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from models.blockchain import Blockchain
 from models.transaction_pool import TransactionPool
-from services.pubsub import PubSub
+from services.pubsub import PubSub, get_public_ip
 from services.fee_rate_estimator import FeeRateEstimator
-import socket
-app = FastAPI()
+from services.mining_pipeline import MiningPipeline
+from utils.json_response import CodecJSONResponse
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # The pipeline's queues and workers and the fee refresh task belong to the API server's event loop
+    await app.state.mining_pipeline.start()
+    await app.state.fee_rate_estimator.start()
+    yield
+    await app.state.fee_rate_estimator.stop()
+    await app.state.mining_pipeline.stop()
+    validation_executor.shutdown(wait=True)
+
+app = FastAPI(default_response_class=CodecJSONResponse, lifespan=lifespan)
 
 # Initialize components
 blockchain = Blockchain()
 transaction_pool = TransactionPool()
 pubsub = PubSub(blockchain, transaction_pool)
 fee_rate_estimator = FeeRateEstimator(blockchain,transaction_pool) 
+# One bounded pool for ECDSA signature checks, shared by mining and /wallet/transact
+validation_executor = ThreadPoolExecutor(max_workers=max(4, os.cpu_count() or 1))
+mining_pipeline = MiningPipeline(blockchain, transaction_pool, pubsub, validation_executor)
 # Store in app state
 app.state.blockchain = blockchain
 app.state.transaction_pool = transaction_pool
 app.state.pubsub = pubsub
 app.state.wallet = None
 app.state.fee_rate_estimator = fee_rate_estimator
+app.state.mining_pipeline = mining_pipeline
 
 def get_blockchain():
     return app.state.blockchain
@@ -31,15 +50,8 @@ def get_pubsub():
 def get_wallet():
     return app.state.wallet
 
-def get_public_ip():
-    """Get the public IP address of the current machine."""
-    try:
-        s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        s.connect(("8.8.8.8", 80))
-        ip = s.getsockname()[0]
-        s.close()
-        return ip
-    except Exception:
-        return "127.0.0.1"
 def get_fee_rate_estimator():
-    return app.state.fee_rate_estimator
\ No newline at end of file
+    return app.state.fee_rate_estimator
+
+def get_mining_pipeline():
+    return app.state.mining_pipeline
\ No newline at end of file
@@ -1,11 +1,14 @@
 import time
 import logging
 import json
-from utils.cryptohash import crypto_hash
+from utils.cryptohash import crypto_hash, stringify_args, crypto_hash_raw_with
+from utils.json_codec import encode_block
 from core.config import MINRATE, BLOCK_SIZE_LIMIT, TARGET_BLOCK_TIME, BLOCK_SUBSIDY, HALVING_INTERVAL
-from utils.hex_to_binary import hex_to_binary
+from utils.hex_to_binary import leading_zero_bits_ok, digest_meets_difficulty
 from models.transaction import Transaction
 
+logger = logging.getLogger(__name__)
+
 GENESIS_DATA = {
     "data": [
         {
@@ -62,15 +65,18 @@ class Block:
             self.nonce = nonce
             self.height = height if height is not None else 0
             self.version = version if version is not None else 1
-            self.merkle_root = merkle_root if merkle_root is not None else self.calculate_merkle_root()
+            self.merkle_root = merkle_root if merkle_root is not None else Block.calculate_merkle_root(data)
             self.tx_count = tx_count if tx_count is not None else len(data)
-
-            logging.basicConfig(level=logging.INFO)
-            self.logger = logging.getLogger(__name__)
+            # Blocks never change once built, so their serialized forms are computed once
+            self._json_cache = None
+            self._json_bytes = None
+            self._data_size = None
+            self._tx_ids = None
+            self._computed_merkle_root = None
 
             self.validate_block()
         except Exception as e:
-            self.logger.error(f"Error initializing block: {str(e)}")
+            logger.error(f"Error initializing block: {str(e)}")
             raise
 
     def validate_block(self):
@@ -83,9 +89,11 @@ class Block:
             raise ValueError("Transaction count does not match data length")
 
     def to_json(self):
-        """Serialize block to JSON."""
+        """Serialize block to JSON. The dict is cached and shared, so callers must not mutate it."""
+        if self._json_cache is not None:
+            return self._json_cache
         try:
-            return {
+            self._json_cache = {
                 'timestamp': self.timestamp,
                 'last_hash': self.last_hash,
                 'hash': self.hash,
@@ -97,10 +105,36 @@ class Block:
                 'merkle_root': self.merkle_root,
                 'tx_count': self.tx_count
             }
+            return self._json_cache
         except Exception as e:
-            self.logger.error(f"Error serializing block: {str(e)}")
+            logger.error(f"Error serializing block: {str(e)}")
             raise
 
+    def to_json_bytes(self):
+        """Serialize block to encoded JSON bytes with the block-shaped encoder, cached like to_json."""
+        if self._json_bytes is None:
+            self._json_bytes = encode_block(self.to_json())
+        return self._json_bytes
+
+    def data_size(self):
+        """Size of the block's transactions as counted for block fullness, computed once."""
+        if self._data_size is None:
+            # Transactions carry the size their fee was charged on, so no repr is built to measure them
+            self._data_size = sum(tx['size'] if isinstance(tx, dict) else tx.size for tx in self.data)
+        return self._data_size
+
+    def tx_ids(self):
+        """Frozenset of the block's transaction ids, computed once."""
+        if self._tx_ids is None:
+            self._tx_ids = frozenset(tx['id'] if isinstance(tx, dict) else tx.id for tx in self.data)
+        return self._tx_ids
+
+    def computed_merkle_root(self):
+        """Merkle root recomputed from the block's own data, hashed once however often it is validated."""
+        if self._computed_merkle_root is None:
+            self._computed_merkle_root = Block.calculate_merkle_root(self.data)
+        return self._computed_merkle_root
+
     @staticmethod
     def mine_block(last_block, data):
         """Mine a new block."""
@@ -121,23 +155,26 @@ class Block:
             merkle_root = Block.calculate_merkle_root(serialized_data)
             tx_count = len(data)
 
-            hash = crypto_hash(
-                timestamp, last_hash, serialized_data, difficulty, nonce, height, version, merkle_root, tx_count
-            )
+            # Only timestamp, difficulty and nonce change between attempts, so the rest of the
+            # header (above all the transaction list) is serialized once for the whole search
+            fixed_args = stringify_args(last_hash, serialized_data, height, version, merkle_root, tx_count)
+            digest = crypto_hash_raw_with(fixed_args, timestamp, difficulty, nonce)
 
-            while hex_to_binary(hash)[:difficulty] != '0' * difficulty:
+            while not digest_meets_difficulty(digest, difficulty):
                 nonce += 1
                 timestamp = time.time_ns()
                 difficulty = Block.adjust_difficulty(last_block, timestamp)
-                hash = crypto_hash(
-                    timestamp, last_hash, serialized_data, difficulty, nonce, height, version, merkle_root, tx_count
-                )
+                digest = crypto_hash_raw_with(fixed_args, timestamp, difficulty, nonce)
+            hash = digest.hex()
 
-            return Block(
+            block = Block(
                 timestamp, last_hash, hash, serialized_data, difficulty, nonce, height, version, merkle_root, tx_count
             )
+            # merkle_root was computed from exactly this data, so validating the block needn't rehash it
+            block._computed_merkle_root = merkle_root
+            return block
         except Exception as e:
-            logging.getLogger(__name__).error(f"Error mining block: {str(e)}")
+            logger.error(f"Error mining block: {str(e)}")
             raise
 
     @staticmethod
@@ -153,7 +190,7 @@ class Block:
                 serialized_tx = json.dumps(tx_json, sort_keys=True, separators=(',', ':'), default=lambda x: f"{x:.4f}" if isinstance(x, float) else x)
                 tx_hash = crypto_hash(serialized_tx)
                 hashes.append(tx_hash)
-                logging.getLogger(__name__).debug(f"Transaction hash: {tx_hash} for tx: {serialized_tx}")
+                logger.debug(f"Transaction hash: {tx_hash} for tx: {serialized_tx}")
 
             while len(hashes) > 1:
                 temp = []
@@ -166,7 +203,7 @@ class Block:
 
             return hashes[0]
         except Exception as e:
-            logging.getLogger(__name__).error(f"Error calculating Merkle root: {str(e)}")
+            logger.error(f"Error calculating Merkle root: {str(e)}")
             raise
 
     @staticmethod
@@ -175,7 +212,7 @@ class Block:
         try:
             return Block(**GENESIS_DATA)
         except Exception as e:
-            logging.getLogger(__name__).error(f"Error creating genesis block: {str(e)}")
+            logger.error(f"Error creating genesis block: {str(e)}")
             raise
 
     @staticmethod
@@ -195,7 +232,7 @@ class Block:
                 tx_count=block_json.get('tx_count', len(block_json['data']))
             )
         except Exception as e:
-            logging.getLogger(__name__).error(f"Error deserializing block: {str(e)}")
+            logger.error(f"Error deserializing block: {str(e)}")
             raise
 
     @staticmethod
@@ -209,12 +246,12 @@ class Block:
                 return last_block.difficulty - 1
             return last_block.difficulty
         except Exception as e:
-            logging.getLogger(__name__).error(f"Error adjusting difficulty: {str(e)}")
+            logger.error(f"Error adjusting difficulty: {str(e)}")
             return last_block.difficulty
 
     @staticmethod
-    def is_valid_block(last_block, block):
-        """Validate a block."""
+    def is_valid_header(last_block, block):
+        """Validate a block's link, proof of work, Merkle root and hash, without checking its transactions."""
         try:
             if not isinstance(last_block, Block) or not isinstance(block, Block):
                 raise ValueError("Invalid block types")
@@ -222,7 +259,7 @@ class Block:
             if block.last_hash != last_block.hash:
                 raise ValueError("Last hash mismatch")
 
-            if hex_to_binary(block.hash)[:block.difficulty] != '0' * block.difficulty:
+            if not leading_zero_bits_ok(block.hash, block.difficulty):
                 raise ValueError("Proof of work requirement not met")
 
             if abs(last_block.difficulty - block.difficulty) > 1:
@@ -231,7 +268,7 @@ class Block:
             if block.height != last_block.height + 1:
                 raise ValueError("Invalid block height")
 
-            calculated_merkle_root = Block.calculate_merkle_root(block.data)
+            calculated_merkle_root = block.computed_merkle_root()
             if block.merkle_root != calculated_merkle_root:
                 raise ValueError(f"Invalid Merkle root: expected {calculated_merkle_root}, got {block.merkle_root}")
 
@@ -245,14 +282,22 @@ class Block:
 
             if reconstructed_hash != block.hash:
                 raise ValueError("Block hash mismatch")
+        except Exception as e:
+            logger.error(f"Error validating block: {str(e)}")
+            raise
 
-            # Validate transactions
+    @staticmethod
+    def is_valid_transactions(block):
+        """Validate a block's transactions and its coinbase reward."""
+        try:
             coinbase_count = 0
             total_fees = 0.0
             coinbase_tx = None
+            transactions = [Transaction.from_json(tx_json) for tx_json in block.data]
+            # Signatures are checked together first, so the per-transaction checks below hit the cache
+            Transaction.verify_signatures(transactions)
             # First pass: collect fees from non-coinbase transactions
-            for tx_json in block.data:
-                tx = Transaction.from_json(tx_json)
+            for tx in transactions:
                 Transaction.is_valid(tx)
                 if tx.is_coinbase:
                     coinbase_count += 1
@@ -267,7 +312,7 @@ class Block:
                 subsidy = BLOCK_SUBSIDY // (2 ** (block.height // HALVING_INTERVAL))
                 total_output = sum(v for k, v in coinbase_tx.output.items())
                 if total_output > subsidy + total_fees:
-                    logging.getLogger(__name__).error(
+                    logger.error(
                         f"Invalid coinbase output: {total_output} exceeds subsidy {subsidy} + fees {total_fees}"
                     )
                     raise ValueError(f"Invalid coinbase output: {total_output} exceeds {subsidy} + {total_fees}")
@@ -276,5 +321,5 @@ class Block:
                 raise ValueError("Missing coinbase transaction")
 
         except Exception as e:
-            logging.getLogger(__name__).error(f"Error validating block: {str(e)}")
+            logger.error(f"Error validating block: {str(e)}")
             raise
\ No newline at end of file
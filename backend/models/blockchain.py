@@ -1,19 +1,30 @@
 import logging
 from models.transaction import Transaction
 from models.block import Block
+from utils.json_codec import encode_json
 from core.config import (
-    BLOCK_SUBSIDY, HALVING_INTERVAL
+    BLOCK_SUBSIDY, HALVING_INTERVAL, BLOCK_SIZE_LIMIT
 )
 
+logger = logging.getLogger(__name__)
+
+# Transactions whose signatures is_valid_chain verifies as one batch; far below the
+# verified-signature cache size, so a batch is never evicted before its blocks are checked
+SIGNATURE_BATCH_SIZE = 8192
+
 class Blockchain:
     def __init__(self):
         self.chain = [Block.genesis()]
         self.utxo_set = {}
+        self.utxo_by_addr = {}  # address -> {tx_id: amount}
+        self.balance_by_addr = {}  # address -> sum of its unspent amounts
+        self.by_hash = {}  # block hash -> block
+        self.by_txid = {}  # tx_id -> block containing it
+        self.by_address = {}  # address -> [(block, tx_json)] in chain order
         self.current_height = 0
         self.difficulty_adjustment_blocks = []
-        logging.basicConfig(level=logging.INFO)
-        self.logger = logging.getLogger(__name__)
         self.initialize_utxo_set()
+        self.index_chain()
 
     def initialize_utxo_set(self):
         """Initialize the UTXO set from the genesis block."""
@@ -24,13 +35,74 @@ class Blockchain:
                 tx = Transaction.from_json(tx_json)
                 if tx.output:
                     self.utxo_set[tx.id] = tx.output
-                    self.logger.debug(f"Initialized UTXO for genesis tx {tx.id}: {tx.output}")
+                    logger.debug("Initialized UTXO for genesis tx %s: %s", tx.id, tx.output)
                 else:
-                    self.logger.warning(f"Genesis transaction {tx.id} has no outputs to add to UTXO set.")
+                    logger.warning(f"Genesis transaction {tx.id} has no outputs to add to UTXO set.")
+            self.index_utxo_set()
         except Exception as e:
-            self.logger.error(f"Error initializing UTXO set: {str(e)}")
+            logger.error(f"Error initializing UTXO set: {str(e)}")
             raise
 
+    def index_utxo_set(self):
+        """Rebuild the per-address UTXO and balance indexes from the UTXO set."""
+        # Built aside and swapped in whole: replace_chain runs this on the chain worker thread
+        # while API handlers keep reading balances and UTXOs
+        utxo_by_addr = {}
+        balance_by_addr = {}
+        for tx_id, outputs in self.utxo_set.items():
+            self.index_utxo(tx_id, outputs, utxo_by_addr, balance_by_addr)
+        self.utxo_by_addr = utxo_by_addr
+        self.balance_by_addr = balance_by_addr
+
+    def index_utxo(self, tx_id, outputs, utxo_by_addr=None, balance_by_addr=None):
+        """Add a transaction's outputs to the per-address UTXO and balance indexes (the live ones by default)."""
+        if utxo_by_addr is None:
+            utxo_by_addr = self.utxo_by_addr
+        if balance_by_addr is None:
+            balance_by_addr = self.balance_by_addr
+        for addr, amount in outputs.items():
+            entries = utxo_by_addr.setdefault(addr, {})
+            previous = entries.get(tx_id, 0)
+            entries[tx_id] = amount
+            balance_by_addr[addr] = balance_by_addr.get(addr, 0.0) + amount - previous
+
+    def unindex_utxo(self, tx_id, outputs):
+        """Remove a transaction's outputs from the per-address UTXO and balance indexes."""
+        for addr in outputs:
+            entries = self.utxo_by_addr.get(addr)
+            if entries is not None:
+                if tx_id in entries:
+                    self.balance_by_addr[addr] -= entries.pop(tx_id)
+                if not entries:
+                    del self.utxo_by_addr[addr]
+                    # Drop the entry rather than keep float residue for a spent-out address
+                    self.balance_by_addr.pop(addr, None)
+
+    def index_chain(self):
+        """Rebuild the block lookup indexes from the current chain."""
+        # Built aside and swapped in whole, so lookups during a chain replacement see the old
+        # indexes until the new ones are complete
+        by_hash = {}
+        by_txid = {}
+        by_address = {}
+        for block in self.chain:
+            self.index_block(block, by_hash, by_txid, by_address)
+        self.by_hash = by_hash
+        self.by_txid = by_txid
+        self.by_address = by_address
+
+    def index_block(self, block, by_hash=None, by_txid=None, by_address=None):
+        """Add a block and its transactions to the lookup indexes (the live ones by default)."""
+        if by_hash is None:
+            by_hash, by_txid, by_address = self.by_hash, self.by_txid, self.by_address
+        by_hash[block.hash] = block
+        for tx_json in block.data:
+            by_txid[tx_json['id']] = block
+            addresses = set(tx_json['output'])
+            addresses.add(tx_json['input'].get('address'))
+            for address in addresses:
+                by_address.setdefault(address, []).append((block, tx_json))
+
     def add_block(self, transactions):
         """Add a new block to the chain and update the UTXO set."""
         try:
@@ -58,15 +130,16 @@ class Blockchain:
                         raise ValueError(f"Invalid transaction input: input amount {input_amount} exceeds UTXO amount {utxo_amount}")
             new_block = Block.mine_block(last_block, serialized_transactions)
             self.chain.append(new_block)
+            self.index_block(new_block)
             self.current_height = new_block.height
             self.update_utxo_set(new_block)
-            self.logger.info(f"Successfully added block {new_block.height} with hash {new_block.hash[:8]}...")
+            logger.info(f"Successfully added block {new_block.height} with hash {new_block.hash[:8]}...")
             return new_block
         except ValueError as ve:
-            self.logger.error(f"Block {last_block.height + 1} REJECTED: {str(ve)}")
+            logger.error(f"Block {last_block.height + 1} REJECTED: {str(ve)}")
             raise
         except Exception as e:
-            self.logger.error(f"Critical error adding block after {last_block.height}: {str(e)}")
+            logger.error(f"Critical error adding block after {last_block.height}: {str(e)}")
             raise
 
     def update_utxo_set(self, block):
@@ -81,19 +154,21 @@ class Blockchain:
                         prev_tx_ids = input_data['prev_tx_ids']
                         for prev_tx_id in prev_tx_ids:
                             if prev_tx_id in self.utxo_set and input_address in self.utxo_set[prev_tx_id]:
-                                self.logger.debug(f"Spending UTXO from tx {prev_tx_id} for address {input_address} by tx {tx.id}")
-                                del self.utxo_set[prev_tx_id]
+                                logger.debug("Spending UTXO from tx %s for address %s by tx %s", prev_tx_id, input_address, tx.id)
+                                self.unindex_utxo(prev_tx_id, self.utxo_set.pop(prev_tx_id))
                             else:
                                 raise ValueError(f"Invalid transaction input: no UTXO found for tx {prev_tx_id} and address {input_address} in tx {tx.id}")
                     else:
                         raise ValueError(f"Invalid transaction input format in tx {tx.id}: missing 'address' or 'prev_tx_ids'")
                 if tx.output:
                     if tx.id in self.utxo_set:
-                        self.logger.warning(f"Duplicate transaction ID {tx.id} encountered in UTXO set. Overwriting.")
+                        logger.warning(f"Duplicate transaction ID {tx.id} encountered in UTXO set. Overwriting.")
+                        self.unindex_utxo(tx.id, self.utxo_set[tx.id])
                     self.utxo_set[tx.id] = tx.output
-                    self.logger.debug(f"Added new UTXO entry for tx {tx.id}: {tx.output}")
+                    self.index_utxo(tx.id, tx.output)
+                    logger.debug("Added new UTXO entry for tx %s: %s", tx.id, tx.output)
         except Exception as e:
-            self.logger.error(f"Failed to update UTXO set for block {block.height}: {str(e)}")
+            logger.error(f"Failed to update UTXO set for block {block.height}: {str(e)}")
             raise
 
     def rebuild_utxo_set(self, chain):
@@ -112,18 +187,18 @@ class Blockchain:
                         prev_tx_ids = input_data['prev_tx_ids']
                         for prev_tx_id in prev_tx_ids:
                             if prev_tx_id in temp_utxo:
-                                self.logger.debug(f"Removing UTXO {prev_tx_id} for address {input_address} by tx {tx.id}")
+                                logger.debug("Removing UTXO %s for address %s by tx %s", prev_tx_id, input_address, tx.id)
                                 temp_utxo.pop(prev_tx_id, None)
                             else:
                                 raise ValueError(f"Invalid transaction input: no UTXO found for tx {prev_tx_id} and address {input_address} in tx {tx.id}")
                     if tx.output:
                         if tx.id in temp_utxo:
-                            self.logger.warning(f"Duplicate transaction ID {tx.id} encountered during UTXO rebuild. Overwriting.")
+                            logger.warning(f"Duplicate transaction ID {tx.id} encountered during UTXO rebuild. Overwriting.")
                         temp_utxo[tx.id] = tx.output
-                        self.logger.debug(f"Added UTXO for tx {tx.id}: {tx.output}")
+                        logger.debug("Added UTXO for tx %s: %s", tx.id, tx.output)
             return temp_utxo
         except Exception as e:
-            self.logger.error(f"Failed to rebuild UTXO set for chain of length {len(chain)}: {str(e)}")
+            logger.error(f"Failed to rebuild UTXO set for chain of length {len(chain)}: {str(e)}")
             raise
 
     def replace_chain(self, chain):
@@ -142,13 +217,17 @@ class Blockchain:
             # If all validations pass, update the chain and UTXO set
             self.chain = chain
             self.utxo_set = new_utxo_set
+            self.index_utxo_set()
+            self.index_chain()
             self.current_height = len(chain) - 1
-            self.logger.info(f"Replaced chain with {self.current_height} blocks")
+            logger.info(f"Replaced chain with {self.current_height} blocks")
         except Exception as e:
-            self.logger.error(f"Error replacing chain: {str(e)}")
+            logger.error(f"Error replacing chain: {str(e)}")
             # Roll back to previous state
             self.chain = old_chain
             self.utxo_set = old_utxo_set
+            self.index_utxo_set()
+            self.index_chain()
             raise
 
     def calculate_difficulty(self):
@@ -164,9 +243,16 @@ class Blockchain:
             self.difficulty_adjustment_blocks = []
             return max(int(difficulty), 1)
         except Exception as e:
-            self.logger.error(f"Error calculating difficulty: {str(e)}")
+            logger.error(f"Error calculating difficulty: {str(e)}")
             return self.chain[-1].difficulty
 
+    def block_fullness(self, window=10):
+        """Average fullness of the last `window` blocks relative to BLOCK_SIZE_LIMIT."""
+        recent_blocks = self.chain[-window:]
+        if not recent_blocks:
+            return 0.0
+        return sum(block.data_size() for block in recent_blocks) / (len(recent_blocks) * BLOCK_SIZE_LIMIT)
+
     def to_json(self):
         """Serialize the blockchain to JSON."""
         try:
@@ -176,9 +262,38 @@ class Blockchain:
                 'current_height': self.current_height
             }
         except Exception as e:
-            self.logger.error(f"Error serializing blockchain: {str(e)}")
+            logger.error(f"Error serializing blockchain: {str(e)}")
             raise
 
+    def to_json_bytes(self):
+        """Serialize the blockchain to encoded JSON, splicing in each block's cached bytes."""
+        try:
+            return b''.join(self.iter_json_bytes())
+        except Exception as e:
+            logger.error(f"Error serializing blockchain: {str(e)}")
+            raise
+
+    def iter_json_bytes(self, chunk_size=65536):
+        """Yield the blockchain's JSON encoding in chunks of roughly chunk_size bytes, block by block."""
+        # Snapshot what can change while the chunks are consumed: appends land past `count`,
+        # replace_chain swaps in a new list, and the UTXO set is encoded up front
+        chain = self.chain
+        count = len(chain)
+        tail = (
+            b'],"utxo_set":' + encode_json(self.utxo_set)
+            + b',"current_height":' + str(self.current_height).encode() + b'}'
+        )
+        buffer = bytearray(b'{"chain":[')
+        for i in range(count):
+            if i:
+                buffer += b','
+            buffer += chain[i].to_json_bytes()
+            if len(buffer) >= chunk_size:
+                yield bytes(buffer)
+                buffer.clear()
+        buffer += tail
+        yield bytes(buffer)
+
     @staticmethod
     def from_json(blockchain_json):
         """Deserialize a blockchain from JSON."""
@@ -188,9 +303,10 @@ class Blockchain:
             blockchain.utxo_set = blockchain_json.get('utxo_set', {})
             blockchain.current_height = blockchain_json.get('current_height', len(blockchain.chain) - 1)
             blockchain.initialize_utxo_set()
+            blockchain.index_chain()
             return blockchain
         except Exception as e:
-            logging.getLogger(__name__).error(f"Error deserializing blockchain: {str(e)}")
+            logger.error(f"Error deserializing blockchain: {str(e)}")
             raise
 
     @staticmethod
@@ -199,21 +315,36 @@ class Blockchain:
         try:
             if not chain or chain[0].to_json() != Block.genesis().to_json():
                 raise ValueError("Invalid genesis block")
+            # Links, proof of work and hashes are cheap next to ECDSA, so a chain that fails them
+            # is rejected before any of its signatures are verified
+            for i in range(1, len(chain)):
+                Block.is_valid_header(chain[i-1], chain[i])
             utxo_set = {}
             total_subsidy = 0.0
             total_fees = 0.0
             expected_height = 0
             epsilon = 1e-6
+            batched_through = 1
             for i, block in enumerate(chain):
+                if i >= batched_through:
+                    # Blocks are usually too small to split across the verify threads on their own,
+                    # so the signatures of the next run of blocks are verified together
+                    batch = []
+                    while batched_through < len(chain) and (not batch or len(batch) + len(chain[batched_through].data) <= SIGNATURE_BATCH_SIZE):
+                        batch.extend(Transaction.from_json(tx_json) for tx_json in chain[batched_through].data)
+                        batched_through += 1
+                    Transaction.verify_signatures(batch)
                 if i > 0:
-                    Block.is_valid_block(chain[i-1], block)
+                    Block.is_valid_transactions(block)
                 if block.height != expected_height:
                     raise ValueError(f"Incorrect height at block {i}")
                 expected_height += 1
                 has_coinbase = False
                 for tx_json in block.data:
                     tx = Transaction.from_json(tx_json)
-                    Transaction.is_valid(tx)
+                    # Block.is_valid_transactions has already verified every transaction after genesis
+                    if i == 0:
+                        Transaction.is_valid(tx)
                     if tx.is_coinbase:
                         if has_coinbase:
                             raise ValueError("Multiple coinbase transactions")
@@ -236,7 +367,7 @@ class Blockchain:
             if abs(total_subsidy - (expected_subsidy + total_fees)) > epsilon:
                 raise ValueError(f"Invalid total subsidy: got {total_subsidy:.4f}, expected {expected_subsidy:.4f} + fees {total_fees:.4f}")
         except Exception as e:
-            logging.getLogger(__name__).error(f"Error validating chain: {str(e)}")
+            logger.error(f"Error validating chain: {str(e)}")
             raise
 
     @staticmethod
@@ -254,7 +385,7 @@ class Blockchain:
                 total += blocks_in_period * subsidy
             return total
         except Exception as e:
-            logging.getLogger(__name__).error(f"Error calculating subsidy: {str(e)}")
+            logger.error(f"Error calculating subsidy: {str(e)}")
             raise
     
     
\ No newline at end of file
@@ -1,63 +1,141 @@
+import heapq
+import itertools
 import logging
 from models.transaction import Transaction
+from utils.json_codec import encode_json
+
+logger = logging.getLogger(__name__)
 
 class TransactionPool:
     def __init__(self):
         self.transaction_map = {}
-        logging.basicConfig(level=logging.DEBUG)  # More verbose logging
-        self.logger = logging.getLogger(__name__)
+        self.address_map = {}  # sender address -> {tx_id: transaction}
+        self.priority_heap = []  # (-fee/size, seq, transaction); stale entries are skipped lazily
+        self.priority_seq = {}  # tx_id -> seq of its live heap entry
+        self.seq_counter = itertools.count()
+        self.encoded_map = {}  # tx_id -> JSON bytes, encoded once on insertion
+        self.version = 0  # Bumped on every change so callers can cache pool snapshots
 
-    def set_transaction(self, transaction):
+    def set_transaction(self, transaction, already_validated=False):
         try:
-            self.logger.debug(f"Attempting to add transaction {transaction.id} to pool")
+            logger.debug("Attempting to add transaction %s to pool", transaction.id)
             if not isinstance(transaction, Transaction):
                 raise ValueError("Invalid transaction type")
             
-            Transaction.is_valid(transaction)
+            # Callers that have just run is_valid pass already_validated to skip a second signature check
+            if not already_validated:
+                Transaction.is_valid(transaction)
             
             if transaction.id in self.transaction_map:
-                if transaction.input.get('timestamp') > self.transaction_map[transaction.id].input.get('timestamp'):
-                    self.transaction_map[transaction.id] = transaction
-                    self.logger.info(f"Updated transaction {transaction.id} in pool")
+                pooled = self.transaction_map[transaction.id]
+                # The same object coming back has been updated in place, so refresh its entries
+                if transaction is pooled or transaction.input.get('timestamp') > pooled.input.get('timestamp'):
+                    self.remove_transaction(transaction.id)
+                    self.add_transaction(transaction)
+                    logger.info("Updated transaction %s in pool", transaction.id)
                 else:
-                    self.logger.debug(f"Transaction {transaction.id} already in pool with a newer timestamp")
+                    logger.debug("Transaction %s already in pool with a newer timestamp", transaction.id)
                     
                 return
-            self.transaction_map[transaction.id] = transaction
-            self.logger.info(f"Successfully added transaction {transaction.id} to pool")
+            self.add_transaction(transaction)
+            logger.info("Successfully added transaction %s to pool", transaction.id)
         except Exception as e:
-            self.logger.error(f"Failed to add transaction {transaction.id}: {str(e)}")
+            logger.error("Failed to add transaction %s: %s", transaction.id, e)
             raise
 
+    def add_transaction(self, transaction):
+        """Insert a transaction into the pool and its sender index."""
+        self.transaction_map[transaction.id] = transaction
+        self.encoded_map[transaction.id] = encode_json(transaction.to_json())
+        self.version += 1
+        self.address_map.setdefault(transaction.input.get('address'), {})[transaction.id] = transaction
+        seq = next(self.seq_counter)
+        self.priority_seq[transaction.id] = seq
+        heapq.heappush(self.priority_heap, (-(transaction.fee / transaction.size), seq, transaction))
+        if len(self.priority_heap) > 2 * len(self.transaction_map) + 64:
+            self.compact_priority_heap()
+
+    def remove_transaction(self, tx_id):
+        """Remove a transaction from the pool and its sender index."""
+        transaction = self.transaction_map.pop(tx_id, None)
+        if transaction is not None:
+            self.encoded_map.pop(tx_id, None)
+            self.version += 1
+            self.priority_seq.pop(tx_id, None)
+            address = transaction.input.get('address')
+            entries = self.address_map.get(address)
+            if entries is not None:
+                entries.pop(tx_id, None)
+                if not entries:
+                    del self.address_map[address]
+        return transaction
+
     def existing_transaction(self, address):
         try:
-            for transaction in self.transaction_map.values():
-                if transaction.input.get('address') == address:
-                    return transaction
-            return None
+            entries = self.address_map.get(address)
+            return next(iter(entries.values())) if entries else None
         except Exception as e:
-            self.logger.error(f"Error checking existing transaction: {str(e)}")
+            logger.error("Error checking existing transaction: %s", e)
             return None
 
     def transaction_data(self):
         try:
             return [transaction.to_json() for transaction in self.transaction_map.values()]
         except Exception as e:
-            self.logger.error(f"Error getting transaction data: {str(e)}")
+            logger.error("Error getting transaction data: %s", e)
             return []
 
+    def encoded_transaction_data(self):
+        """The pool's transactions as a JSON array, spliced from the per-transaction encodings."""
+        return b'[' + b','.join(self.encoded_map.values()) + b']'
+
     def clear_blockchain_transactions(self, blockchain):
         """Remove transactions included in blockchain."""
-        for block in blockchain.chain:
-            for tx_json in block.data:
-                tx = Transaction.from_json(tx_json)
-                if tx.id in self.transaction_map:
-                    self.transaction_map.pop(tx.id)
-                    self.logger.debug(f"Cleared transaction {tx.id} from pool")
+        if not self.transaction_map:
+            return
+        # The chain's by_txid index already holds every confirmed id, so only the pool is walked
+        confirmed_ids = [tx_id for tx_id in self.transaction_map if tx_id in blockchain.by_txid]
+        for tx_id in confirmed_ids:
+            self.remove_transaction(tx_id)
+            logger.debug("Cleared transaction %s from pool", tx_id)
+        # Confirmed transactions have been through every check their cached signature result saves
+        Transaction.forget_verified(confirmed_ids)
+
+    def clear_block_transactions(self, blocks):
+        """Remove the transactions confirmed by the given newly added blocks."""
+        if not self.transaction_map:
+            return
+        confirmed_ids = []
+        for block in blocks:
+            # A C-level intersection of the pool's keys with the block's cached id set, so the cost
+            # follows the block size rather than the pool size
+            confirmed_ids.extend(self.transaction_map.keys() & block.tx_ids())
+        for tx_id in confirmed_ids:
+            self.remove_transaction(tx_id)
+            logger.debug("Cleared transaction %s from pool", tx_id)
+        Transaction.forget_verified(confirmed_ids)
+
+    def compact_priority_heap(self):
+        """Drop heap entries for transactions that have left the pool or been replaced."""
+        heap = [
+            entry for entry in self.priority_heap
+            if self.priority_seq.get(entry[2].id) == entry[1]
+        ]
+        heapq.heapify(heap)
+        self.priority_heap = heap
 
-    def get_priority_transactions(self):
-        """Return transactions sorted by fee/size."""
-        return sorted(self.transaction_map.values(), key=lambda tx: tx.fee / tx.size, reverse=True)
+    def get_priority_transactions(self, limit=None):
+        """Return up to `limit` transactions sorted by fee/size, highest first."""
+        if limit is None:
+            limit = len(self.transaction_map)
+        # Read-only over a snapshot: the pool is shared with the P2P thread, whose inserts can
+        # rebind priority_heap through compact_priority_heap at any point
+        priority_seq = self.priority_seq
+        selected = heapq.nsmallest(limit, (
+            entry for entry in list(self.priority_heap)
+            if priority_seq.get(entry[2].id) == entry[1]
+        ))
+        return [entry[2] for entry in selected]
 
     def to_json(self):
         try:
@@ -66,5 +144,5 @@ class TransactionPool:
                 'count': len(self.transaction_map)
             }
         except Exception as e:
-            self.logger.error(f"Error serializing transaction pool: {str(e)}")
+            logger.error("Error serializing transaction pool: %s", e)
             return {}
\ No newline at end of file
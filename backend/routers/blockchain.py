@@ -1,5 +1,6 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from dependencies import get_blockchain, get_transaction_pool, get_pubsub, get_wallet
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from dependencies import get_blockchain, get_transaction_pool, get_pubsub, get_wallet, get_mining_pipeline
 from models.transaction import Transaction
 from schemas.blockchain import (
     BlockchainSchema, BlockchainRangeResponse, BlockchainHeightResponse,
@@ -11,7 +12,9 @@ import logging
 from models.blockchain import Blockchain
 from models.transaction_pool import TransactionPool
 from services.pubsub import PubSub
+from services.mining_pipeline import MiningPipeline
 from models.wallet import Wallet
+from utils.json_codec import encode_json
 from math import ceil
 
 
@@ -24,7 +27,16 @@ MAX_PAGE_SIZE = 100
 @router.get("/blockchain", response_model=BlockchainSchema, status_code=200)
 async def route_blockchain(blockchain: Blockchain = Depends(get_blockchain)):
     try:
-        return blockchain.to_json()
+        # Blocks are trusted in-memory data, so the cached encodings are streamed as-is
+        # rather than revalidated against BlockchainSchema on every request
+        chunks = blockchain.iter_json_bytes()
+
+        # Iterated on the event loop: a plain generator would be moved to a worker thread per chunk
+        async def stream():
+            for chunk in chunks:
+                yield chunk
+
+        return StreamingResponse(stream(), media_type="application/json")
     except Exception as e:
         logger.error(f"Error fetching blockchain: {str(e)}")
         raise HTTPException(status_code=500, detail="Internal server error")
@@ -57,19 +69,21 @@ async def get_paginated_blocks(
         start = max(0, start)
         end = max(0, end)
         
-        blocks = blockchain.chain[start:end]
-        # Reverse to maintain chronological order within the page
-        blocks = blocks[::-1]
-        
-        return {
-            "blocks": [block.to_json() for block in blocks],
+        chain = blockchain.chain
+        page_info = encode_json({
             "page": page,
             "page_size": page_size,
             "total_blocks": total_blocks,
             "total_pages": total_pages,
             "has_next": page < total_pages,
             "has_previous": page > 1
-        }
+        })
+        # Walk the page's index range backwards (latest first) and splice each block's cached
+        # encoding in front of the page fields, instead of building and revalidating block dicts
+        return Response(
+            content=b'{"blocks":[' + b','.join(chain[i].to_json_bytes() for i in range(end - 1, start - 1, -1)) + b'],' + page_info[1:],
+            media_type="application/json"
+        )
     except HTTPException:
         raise
     except Exception as e:
@@ -88,9 +102,14 @@ async def get_latest_blocks(
         if not blockchain.chain:
             raise HTTPException(status_code=404, detail="No blocks found")
             
-        blocks = blockchain.chain[-limit:]
-        # Return in reverse order (latest first)
-        return [block.to_json() for block in reversed(blocks)]
+        chain = blockchain.chain
+        # Return in reverse order (latest first), splicing each block's cached encoding
+        return Response(
+            content=b'[' + b','.join(chain[i].to_json_bytes() for i in range(len(chain) - 1, max(0, len(chain) - limit) - 1, -1)) + b']',
+            media_type="application/json"
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error fetching latest blocks: {str(e)}")
         raise HTTPException(status_code=500, detail="Internal server error")
@@ -118,12 +137,13 @@ async def route_blockchain_range(
         if start >= end:
             raise HTTPException(status_code=400, detail="Invalid range parameters")
             
-        blocks = blockchain.chain[start:end]
-        
-        if reverse:
-            blocks = blocks[::-1]
-            
-        return {"chain": [block.to_json() for block in blocks]}
+        chain = blockchain.chain
+        end = min(end, total_blocks)
+        indices = range(end - 1, start - 1, -1) if reverse else range(start, end)
+        return Response(
+            content=b'{"chain":[' + b','.join(chain[i].to_json_bytes() for i in indices) + b']}',
+            media_type="application/json"
+        )
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid range parameters")
     except Exception as e:
@@ -137,34 +157,17 @@ async def route_mine(
     blockchain: Blockchain = Depends(get_blockchain),
     transaction_pool: TransactionPool = Depends(get_transaction_pool),
     pubsub: PubSub = Depends(get_pubsub),
-    wallet: Optional[Wallet] = Depends(get_wallet)
+    wallet: Optional[Wallet] = Depends(get_wallet),
+    mining_pipeline: MiningPipeline = Depends(get_mining_pipeline)
 ):
     try:
         if not wallet or not blockchain or not transaction_pool or not pubsub:
             raise HTTPException(status_code=400, detail="Blockchain, transaction pool, wallet, or PubSub not initialized")
-        transactions = transaction_pool.get_priority_transactions()[:10]
-        valid_transactions = []
-        for tx in transactions:
-            try:
-                Transaction.is_valid(tx)
-                valid_transactions.append(tx)
-            except Exception as e:
-                logger.warning(f"Invalid transaction {tx.id} skipped: {str(e)}")
-        total_fees = sum(tx.fee for tx in valid_transactions)
-        miner_address = request.miner_address or wallet.address
-        coinbase_tx = Transaction.create_coinbase(miner_address, blockchain.current_height + 1, total_fees)
-        all_transactions = [coinbase_tx] + valid_transactions
-        new_block = blockchain.add_block(all_transactions)
-        pubsub.save_block_to_db(new_block)
-        transaction_pool.clear_blockchain_transactions(blockchain)
-        pubsub.broadcast_block_sync(new_block)
-        confirmed_balance = wallet.calculate_balance(blockchain, wallet.address) if wallet else 0.0
-        return {
-            "message": "Block mined successfully",
-            "block": new_block.to_json(),
-            "reward": coinbase_tx.output[miner_address],
-            "confirmed_balance": confirmed_balance
-        }
+        # Mining, persisting and broadcasting run as pipeline stages, so this
+        # request's block can be mined while the previous one is still being published
+        return await mining_pipeline.submit(request.miner_address or wallet.address, wallet)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Unexpected error in mining: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -194,14 +197,10 @@ async def route_blockchain_height_by_height(height: int, blockchain: Blockchain
     try:
         if height < 0 or height > blockchain.current_height:
             raise HTTPException(status_code=400, detail="Invalid block height")
-        block = None
-        for b in blockchain.chain:
-            if b.height == height:
-                block = b
-                break
-        if not block:
-            raise HTTPException(status_code=404, detail="Block not found")
-        return block.to_json()
+        # Chain validation guarantees a block's height equals its position in the chain
+        return Response(content=blockchain.chain[height].to_json_bytes(), media_type="application/json")
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error fetching block by height: {str(e)}")
         raise HTTPException(status_code=500, detail="Internal server error")
@@ -209,14 +208,12 @@ async def route_blockchain_height_by_height(height: int, blockchain: Blockchain
 @router.get("/blockchain/hash/{block_hash}", response_model=BlockSchema, status_code=200)
 async def route_blockchain_hash(block_hash: str, blockchain: Blockchain = Depends(get_blockchain)):
     try:
-        block = None
-        for b in blockchain.chain:
-            if b.hash == block_hash:
-                block = b
-                break
+        block = blockchain.by_hash.get(block_hash)
         if not block:
             raise HTTPException(status_code=404, detail="Block not found")
-        return block.to_json()
+        return Response(content=block.to_json_bytes(), media_type="application/json")
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error fetching block by hash: {str(e)}")
         raise HTTPException(status_code=500, detail="Internal server error")
@@ -224,17 +221,12 @@ async def route_blockchain_hash(block_hash: str, blockchain: Blockchain = Depend
 @router.get("/blockchain/tx/{tx_id}", response_model=BlockSchema, status_code=200)
 async def route_blockchain_tx(tx_id: str, blockchain: Blockchain = Depends(get_blockchain)):
     try:
-        block = None
-        for b in blockchain.chain:
-            for tx in b.data:
-                if tx["id"] == tx_id:
-                    block = b
-                    break
-            if block:
-                break
+        block = blockchain.by_txid.get(tx_id)
         if not block:
             raise HTTPException(status_code=404, detail="Transaction not found")
-        return block.to_json()
+        return Response(content=block.to_json_bytes(), media_type="application/json")
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error fetching block by transaction ID: {str(e)}")
         raise HTTPException(status_code=500, detail="Internal server error")
\ No newline at end of file
@@ -1,7 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from dependencies import get_blockchain, get_transaction_pool
 from schemas.transaction import TransactionPoolSchema, TransactionByAddressSchema
-from typing import List
+from utils.json_codec import encode_json
+from utils.json_response import CodecJSONResponse
+from typing import List, Optional
+import functools
+import heapq
 import time
 import logging
 
@@ -21,44 +25,77 @@ class TransactionResponseSchema:
 
 @router.get("/transaction", response_model=TransactionPoolSchema, status_code=200)
 async def route_transaction_pool(transaction_pool=Depends(get_transaction_pool)):
-    return transaction_pool.to_json()
+    # Pooled transactions were validated on entry, so their cached encodings are spliced
+    # together instead of being revalidated against TransactionPoolSchema
+    return Response(
+        content=b'{"transactions":' + transaction_pool.encoded_transaction_data()
+        + b',"count":' + str(len(transaction_pool.transaction_map)).encode() + b'}',
+        media_type="application/json"
+    )
 
 @router.get("/transactions/{address}", response_model=List[TransactionByAddressSchema], status_code=200)
 async def route_transactions_by_address(
     address: str,
+    limit: Optional[int] = Query(None, ge=1, description="Return only the newest N transactions"),
     blockchain=Depends(get_blockchain),
     transaction_pool=Depends(get_transaction_pool)
 ):
     transactions = []
-    # Check transaction pool (pending transactions)
-    for tx in transaction_pool.transaction_data():
-        if tx["input"].get("address") == address or address in tx["output"]:
+    # Check transaction pool (pending transactions); only matches are serialized
+    for pending in transaction_pool.transaction_map.values():
+        if pending.input.get("address") == address or address in pending.output:
+            tx = pending.to_json()
             tx_data = {
                 "id": tx["id"],
                 "input": tx["input"],
                 "output": tx["output"],
                 "status": "pending",
+                "blockHeight": None,
                 "timestamp": tx["input"].get("timestamp", time.time() * 1000000),
                 "fee": tx.get("fee", 0),
             }
             transactions.append(tx_data)
     # Check blockchain (confirmed transactions)
-    for block in blockchain.chain:
-        for tx in block.data:
-            if tx["input"].get("address") == address or address in tx["output"]:
-                tx_data = {
-                    "id": tx["id"],
-                    "input": tx["input"],
-                    "output": tx["output"],
-                    "status": "confirmed",
-                    "blockHeight": block.height,
-                    "timestamp": tx["input"].get("timestamp", block.timestamp),
-                    "fee": tx.get("fee", 0),
-                }
-                transactions.append(tx_data)
-    # Sort by timestamp (newest first)
-    transactions.sort(key=lambda x: x.get("timestamp", 0), reverse=True)
-    return transactions
+    for block, tx in blockchain.by_address.get(address, ()):
+        tx_data = {
+            "id": tx["id"],
+            "input": tx["input"],
+            "output": tx["output"],
+            "status": "confirmed",
+            "blockHeight": block.height,
+            "timestamp": tx["input"].get("timestamp", block.timestamp),
+            "fee": tx.get("fee", 0),
+        }
+        transactions.append(tx_data)
+    # Sort by timestamp (newest first); with a limit only the top N are selected
+    if limit is not None:
+        transactions = heapq.nlargest(limit, transactions, key=lambda x: x.get("timestamp", 0))
+    else:
+        transactions.sort(key=lambda x: x.get("timestamp", 0), reverse=True)
+    # Built here from trusted chain and pool data, so returned without response_model revalidation
+    return CodecJSONResponse(content=transactions)
+
+# Confirmed transactions never change, so their encoded replies are cached. Keying on the
+# block object itself means a reorg, which brings in new Block objects, can never hit a stale entry
+@functools.lru_cache(maxsize=4096)
+def confirmed_transaction_bytes(block, transaction_id):
+    for tx in block.data:
+        # Handle both dict and Transaction object cases
+        tx_id = tx["id"] if isinstance(tx, dict) else tx.id
+        if tx_id == transaction_id:
+            return encode_json({
+                "id": tx_id,
+                "input": tx["input"] if isinstance(tx, dict) else tx.input,
+                "output": tx["output"] if isinstance(tx, dict) else tx.output,
+                "fee": tx.get("fee", 0) if isinstance(tx, dict) else tx.fee,
+                "size": tx.get("size", 0) if isinstance(tx, dict) else tx.size,
+                "is_coinbase": tx.get("is_coinbase", False) if isinstance(tx, dict) else tx.is_coinbase,
+                "status": "confirmed",
+                "block_height": block.height,
+                "timestamp": tx["input"].get("timestamp", block.timestamp) if isinstance(tx, dict) else tx.input.timestamp
+            })
+    return None
+
 #tracation by id
 @router.get("/transaction/id/{transaction_id}", status_code=200)
 async def route_transaction_by_id(
@@ -75,36 +112,26 @@ async def route_transaction_by_id(
     """
     try:
         # Check transaction pool first (pending transactions)
-        for tx in transaction_pool.transaction_data():
-            if tx["id"] == transaction_id:
-                return {
-                    "id": tx["id"],
-                    "input": tx["input"],
-                    "output": tx["output"],
-                    "fee": tx.get("fee", 0),
-                    "size": tx.get("size", 0),
-                    "is_coinbase": False,
-                    "status": "pending",
-                    "timestamp": tx["input"].get("timestamp", time.time() * 1000000)
-                }
+        pending = transaction_pool.transaction_map.get(transaction_id)
+        if pending is not None:
+            tx = pending.to_json()
+            return {
+                "id": tx["id"],
+                "input": tx["input"],
+                "output": tx["output"],
+                "fee": tx.get("fee", 0),
+                "size": tx.get("size", 0),
+                "is_coinbase": False,
+                "status": "pending",
+                "timestamp": tx["input"].get("timestamp", time.time() * 1000000)
+            }
 
         # Check blockchain (confirmed transactions)
-        for block in blockchain.chain:
-            for tx in block.data:
-                # Handle both dict and Transaction object cases
-                tx_id = tx["id"] if isinstance(tx, dict) else tx.id
-                if tx_id == transaction_id:
-                    return {
-                        "id": tx_id,
-                        "input": tx["input"] if isinstance(tx, dict) else tx.input,
-                        "output": tx["output"] if isinstance(tx, dict) else tx.output,
-                        "fee": tx.get("fee", 0) if isinstance(tx, dict) else tx.fee,
-                        "size": tx.get("size", 0) if isinstance(tx, dict) else tx.size,
-                        "is_coinbase": tx.get("is_coinbase", False) if isinstance(tx, dict) else tx.is_coinbase,
-                        "status": "confirmed",
-                        "block_height": block.height,
-                        "timestamp": tx["input"].get("timestamp", block.timestamp) if isinstance(tx, dict) else tx.input.timestamp
-                    }
+        block = blockchain.by_txid.get(transaction_id)
+        if block is not None:
+            payload = confirmed_transaction_bytes(block, transaction_id)
+            if payload is not None:
+                return Response(content=payload, media_type="application/json")
 
         raise HTTPException(
             status_code=404,
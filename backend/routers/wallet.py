@@ -1,7 +1,10 @@
 from fastapi import APIRouter, HTTPException, Depends, Header
 from pydantic import BaseModel, Field
 from typing import Optional, Annotated, Dict
+import asyncio
+import copy
 import logging
+import re
 from models.wallet import Wallet
 from models.transaction import Transaction
 from models.blockchain import Blockchain
@@ -9,14 +12,19 @@ from models.transaction_pool import TransactionPool
 from services.pubsub import PubSub
 from services.fee_rate_estimator import FeeRateEstimator
 from schemas.wallet import WalletInitRequest, WalletInfoResponse, TransactRequest, TransactResponse, FeeRateResponse,WalletInfoResponseinit_wallet
-from core.config import BASE_TX_SIZE, MIN_FEE, DEFAULT_FEE_RATE, BLOCK_SIZE_LIMIT, PRIORITY_MULTIPLIERS
-from dependencies import get_blockchain, get_transaction_pool, get_pubsub, app, get_fee_rate_estimator
+from core.config import BASE_TX_SIZE, MIN_FEE, DEFAULT_FEE_RATE, PRIORITY_MULTIPLIERS
+from dependencies import get_blockchain, get_transaction_pool, get_pubsub, app, get_fee_rate_estimator, validation_executor
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Private keys are 32 bytes, sent as 64 hex characters
+PRIVATE_KEY_HEX = re.compile(r'[0-9a-fA-F]{64}')
+
+transact_lock = asyncio.Lock()
+
 # Create type aliases for dependency injection
 BlockchainDep = Annotated[Blockchain, Depends(get_blockchain)]
 TransactionPoolDep = Annotated[TransactionPool, Depends(get_transaction_pool)]
@@ -49,7 +57,7 @@ async def init_wallet(
         private_key_hex = request.private_key or None
         if private_key_hex:
             private_key_hex = private_key_hex.strip()
-            if not (len(private_key_hex) == 64 and all(c in '0123456789abcdefABCDEF' for c in private_key_hex)):
+            if not PRIVATE_KEY_HEX.fullmatch(private_key_hex):
                 raise HTTPException(status_code=400, detail="Invalid private key format: must be 64-character hexadecimal")
             try:
                 wallet = Wallet.from_private_key_hex(private_key_hex)
@@ -68,6 +76,8 @@ async def init_wallet(
             "publicKey": wallet.public_key,
             "privateKey": wallet.get_private_key_hex(),
         }
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error initializing wallet: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to initialize wallet: {str(e)}")
@@ -102,85 +112,86 @@ async def route_wallet_transact(
             raise HTTPException(status_code=400, detail="Blockchain, transaction pool, or PubSub not initialized")
         if request.recipient == wallet.address:
             raise HTTPException(status_code=400, detail="Cannot send to self")
-        logger.info(f"Transact request: {request}")
+        logger.info("Transact request: %s", request)
         # Get dynamic fee rate based on priority
-        base_fee_rate = fee_rate_estimator.get_fee_rate()
-        priority_multiplier = PRIORITY_MULTIPLIERS.get(request.priority, 1.0)
-        fee_rate = base_fee_rate * priority_multiplier
+        fee_rate = fee_rate_estimator.get_fee_rate_for(request.priority)
         
-        confirmed_balance = wallet.calculate_balance(blockchain, wallet.address)
-        pending_txs = [
-            tx for tx in transaction_pool.transaction_map.values()
-            if tx.input.get("address") == wallet.address
-        ]
-        total_pending_spend = sum(
-            sum(v for k, v in tx.output.items() if k != wallet.address) + tx.fee
-            for tx in pending_txs
-        )
-        available_balance = confirmed_balance - total_pending_spend
+        # Validation now awaits the thread pool, so the balance check through pool insertion is
+        # serialized to keep concurrent requests from spending the same funds
+        async with transact_lock:
+            confirmed_balance = wallet.calculate_balance(blockchain, wallet.address)
+            pending_txs = [
+                tx for tx in transaction_pool.transaction_map.values()
+                if tx.input.get("address") == wallet.address
+            ]
+            total_pending_spend = sum(tx.spend_excluding(wallet.address) for tx in pending_txs)
+            available_balance = confirmed_balance - total_pending_spend
         
-        if available_balance < 0:
-            error_msg = (
-                f"Insufficient funds. Available: {available_balance:.4f} COIN, "
-                f"Pending transactions: {len(pending_txs)}"
-            )
-            raise HTTPException(status_code=400, detail=error_msg)
-
-        if request.amount > available_balance:
-            error_msg = (
-                f"Insufficient funds. Available: {available_balance:.4f} COIN, "
-                f"Requested: {request.amount:.4f} COIN (Pending transactions: {len(pending_txs)})"
-            )
-            raise HTTPException(status_code=400, detail=error_msg)
-        if request.amount + MIN_FEE > available_balance:
-            error_msg = (
-                f"Transaction too small. Minimum transaction size is {MIN_FEE:.4f} COIN "
-                f"for the requested amount of {request.amount:.4f} COIN."
-            )
-            raise HTTPException(status_code=400, detail=error_msg)
-        if request.amount + MIN_FEE > confirmed_balance:
-            error_msg = (
-                f"Transaction too small. Minimum transaction size is {MIN_FEE:.4f} COIN "
-                f"for the requested amount of {request.amount:.4f} COIN."
-            )
-            raise HTTPException(status_code=400, detail=error_msg)
+            if available_balance < 0:
+                error_msg = (
+                    f"Insufficient funds. Available: {available_balance:.4f} COIN, "
+                    f"Pending transactions: {len(pending_txs)}"
+                )
+                raise HTTPException(status_code=400, detail=error_msg)
 
-        # Create transaction to estimate size and fee
-        try:
-            existing_tx = transaction_pool.existing_transaction(wallet.address)
-            if existing_tx:
-                existing_tx.update(wallet, request.recipient, request.amount, fee_rate=fee_rate)
-                Transaction.is_valid(existing_tx)
-                transaction_pool.set_transaction(existing_tx)
-                transaction = existing_tx
-            else:
-                transaction = Transaction(
-                    sender_wallet=wallet,
-                    recipient=request.recipient,
-                    amount=request.amount,
-                    fee_rate=fee_rate
+            if request.amount > available_balance:
+                error_msg = (
+                    f"Insufficient funds. Available: {available_balance:.4f} COIN, "
+                    f"Requested: {request.amount:.4f} COIN (Pending transactions: {len(pending_txs)})"
+                )
+                raise HTTPException(status_code=400, detail=error_msg)
+            if request.amount + MIN_FEE > available_balance:
+                error_msg = (
+                    f"Transaction too small. Minimum transaction size is {MIN_FEE:.4f} COIN "
+                    f"for the requested amount of {request.amount:.4f} COIN."
                 )
-                Transaction.is_valid(transaction)
-                transaction_pool.set_transaction(transaction)
-        except Exception as e:
-            logger.error(f"Transaction creation/validation failed: {str(e)}")
-            raise HTTPException(status_code=400, detail=str(e))
+                raise HTTPException(status_code=400, detail=error_msg)
+            if request.amount + MIN_FEE > confirmed_balance:
+                error_msg = (
+                    f"Transaction too small. Minimum transaction size is {MIN_FEE:.4f} COIN "
+                    f"for the requested amount of {request.amount:.4f} COIN."
+                )
+                raise HTTPException(status_code=400, detail=error_msg)
+
+            # Create transaction to estimate size and fee
+            try:
+                existing_tx = transaction_pool.existing_transaction(wallet.address)
+                if existing_tx:
+                    # Updated on a copy: the pooled object, its encoding and heap entry stay as they were
+                    # until the update validates and set_transaction swaps it in
+                    transaction = Transaction.from_json(copy.deepcopy(existing_tx.to_json()))
+                    transaction.update(wallet, request.recipient, request.amount, fee_rate=fee_rate)
+                else:
+                    transaction = Transaction(
+                        sender_wallet=wallet,
+                        recipient=request.recipient,
+                        amount=request.amount,
+                        fee_rate=fee_rate
+                    )
+                # Signature checks share the mining stage's thread pool instead of blocking the loop
+                await asyncio.get_running_loop().run_in_executor(validation_executor, Transaction.is_valid, transaction)
+                if transaction.id in blockchain.by_txid:
+                    raise ValueError("Transaction was mined while it was being updated, please retry")
+                transaction_pool.set_transaction(transaction, already_validated=True)
+            except Exception as e:
+                logger.error(f"Transaction creation/validation failed: {str(e)}")
+                raise HTTPException(status_code=400, detail=str(e))
         
-        total_cost = request.amount + transaction.fee
-        if total_cost > available_balance:
-            error_msg = (
-                f"Insufficient funds. Available: {available_balance:.4f} COIN, "
-                f"Required: {total_cost:.4f} COIN (Amount: {request.amount:.4f} + Fee: {transaction.fee:.4f}). "
-                f"Pending transactions: {len(pending_txs)}"
-            )
-            raise HTTPException(status_code=400, detail=error_msg)
+            total_cost = request.amount + transaction.fee
+            if total_cost > available_balance:
+                error_msg = (
+                    f"Insufficient funds. Available: {available_balance:.4f} COIN, "
+                    f"Required: {total_cost:.4f} COIN (Amount: {request.amount:.4f} + Fee: {transaction.fee:.4f}). "
+                    f"Pending transactions: {len(pending_txs)}"
+                )
+                raise HTTPException(status_code=400, detail=error_msg)
                 
-        try:
-            pubsub.broadcast_transaction_sync(transaction)
-        except Exception as e:
-            logger.error(f"Broadcast failed: {str(e)}")
-            transaction_pool.transaction_map.pop(transaction.id, None)
-            raise HTTPException(status_code=500, detail=f"Broadcast failed: {str(e)}")
+            try:
+                pubsub.broadcast_transaction_sync(transaction)
+            except Exception as e:
+                logger.error(f"Broadcast failed: {str(e)}")
+                transaction_pool.remove_transaction(transaction.id)
+                raise HTTPException(status_code=500, detail=f"Broadcast failed: {str(e)}")
         
         return {
             "message": "Transaction created successfully",
@@ -194,6 +205,8 @@ async def route_wallet_transact(
                 "available_balance": available_balance - total_cost,
             },
         }
+    except HTTPException:
+        raise
     except ValueError as e:
         logger.error(f"Value error: {str(e)}")
         raise HTTPException(status_code=400, detail=f"Invalid numeric value: {str(e)}")
@@ -210,11 +223,7 @@ async def route_fee_rate(
         fee_rate = fee_rate_estimator.get_fee_rate()
         mempool_size = len(fee_rate_estimator.transaction_pool.transaction_map)
         # Calculate average block fullness for last 10 blocks
-        recent_blocks = blockchain.chain[-10:] if len(blockchain.chain) >= 10 else blockchain.chain
-        block_fullness = (
-            sum(sum(len(str(tx)) for tx in block.data) for block in recent_blocks) / 
-            (len(recent_blocks) * BLOCK_SIZE_LIMIT)
-        ) if recent_blocks else 0.0
+        block_fullness = blockchain.block_fullness(10)
         return {
             "fee_rate": fee_rate,
             "priority_multipliers": PRIORITY_MULTIPLIERS,
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field, NonNegativeFloat
+from pydantic import BaseModel, Field, NonNegativeFloat, field_validator
 from typing import Optional, Any
 from typing import Dict
 class WalletInitRequest(BaseModel):
@@ -19,9 +19,19 @@ class WalletInfoResponseinit_wallet(BaseModel):
 
 class TransactRequest(BaseModel):
     recipient: str
-    amount: float = Field(gt=0)
+    # NaN and infinity would slip past the handler's balance comparisons, so they are refused here
+    amount: float = Field(gt=0, allow_inf_nan=False)
     priority: str = Field(default="medium", pattern="^(low|medium|high)$")
 
+    @field_validator("recipient")
+    @classmethod
+    def recipient_not_blank(cls, value: str) -> str:
+        """Reject blank recipients before the wallet and chain dependencies are resolved."""
+        value = value.strip()
+        if not value:
+            raise ValueError("Recipient address must not be empty")
+        return value
+
 class TransactResponse(BaseModel):
     message: str
     transaction: Any  # Using Any to avoid recursive type issues
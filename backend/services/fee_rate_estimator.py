@@ -5,7 +5,7 @@ from models.blockchain import Blockchain
 from models.transaction_pool import TransactionPool
 from core.config import (
     DEFAULT_FEE_RATE, MEMPOOL_THRESHOLD, BLOCK_FULLNESS_THRESHOLD,
-    FEE_RATE_UPDATE_INTERVAL, BLOCK_SIZE_LIMIT
+    FEE_RATE_UPDATE_INTERVAL, PRIORITY_MULTIPLIERS
 )
 
 logger = logging.getLogger(__name__)
@@ -15,8 +15,28 @@ class FeeRateEstimator:
         self.blockchain = blockchain
         self.transaction_pool = transaction_pool
         self.current_fee_rate = DEFAULT_FEE_RATE
+        self.priority_rates = self.rates_by_priority(DEFAULT_FEE_RATE)
         self.last_update = 0
         self.lock = asyncio.Lock()
+        self.refresh_task = None
+
+    async def start(self):
+        """Start the background task that keeps the fee rate fresh on the running loop."""
+        self.refresh_task = asyncio.create_task(self.refresh_loop())
+
+    async def stop(self):
+        """Cancel the background refresh task."""
+        if self.refresh_task is None:
+            return
+        self.refresh_task.cancel()
+        await asyncio.gather(self.refresh_task, return_exceptions=True)
+        self.refresh_task = None
+
+    async def refresh_loop(self):
+        """Recompute the fee rate every FEE_RATE_UPDATE_INTERVAL seconds."""
+        while True:
+            await self.update_fee_rate()
+            await asyncio.sleep(FEE_RATE_UPDATE_INTERVAL)
 
     async def update_fee_rate(self):
         """Update the fee rate based on mempool size and block fullness."""
@@ -24,11 +44,7 @@ class FeeRateEstimator:
             async with self.lock:
                 mempool_size = len(self.transaction_pool.transaction_map)
                 # Calculate average block fullness for last 10 blocks
-                recent_blocks = self.blockchain.chain[-10:] if len(self.blockchain.chain) >= 10 else self.blockchain.chain
-                block_fullness = (
-                    sum(sum(len(str(tx)) for tx in block.data) for block in recent_blocks) / 
-                    (len(recent_blocks) * BLOCK_SIZE_LIMIT)
-                ) if recent_blocks else 0.0
+                block_fullness = self.blockchain.block_fullness(10)
                 
                 # Adjust fee rate
                 fee_rate = DEFAULT_FEE_RATE
@@ -38,23 +54,22 @@ class FeeRateEstimator:
                     fee_rate *= (1 + (block_fullness / BLOCK_FULLNESS_THRESHOLD) * 0.3)
                 
                 self.current_fee_rate = max(fee_rate, DEFAULT_FEE_RATE)
+                self.priority_rates = self.rates_by_priority(self.current_fee_rate)
                 self.last_update = time.time()
-                logger.info(f"Updated fee rate: {self.current_fee_rate:.8f} COIN/byte, "
-                           f"mempool_size: {mempool_size}, block_fullness: {block_fullness:.2f}")
+                logger.info("Updated fee rate: %.8f COIN/byte, mempool_size: %s, block_fullness: %.2f",
+                            self.current_fee_rate, mempool_size, block_fullness)
         except Exception as e:
             logger.error(f"Error updating fee rate: {str(e)}")
 
-    async def ensure_updated(self):
-        """Ensure the fee rate is updated if stale."""
-        if time.time() - self.last_update > FEE_RATE_UPDATE_INTERVAL:
-            await self.update_fee_rate()
+    @staticmethod
+    def rates_by_priority(fee_rate):
+        """Effective fee rate for each priority, computed once per fee rate update."""
+        return {priority: fee_rate * multiplier for priority, multiplier in PRIORITY_MULTIPLIERS.items()}
 
     def get_fee_rate(self):
-        """Get the current fee rate, updating if necessary."""
-        try:
-            # Use ensure_updated directly since FastAPI handles the event loop
-            asyncio.ensure_future(self.ensure_updated())
-            return self.current_fee_rate
-        except Exception as e:
-            logger.error(f"Error getting fee rate: {str(e)}")
-            return DEFAULT_FEE_RATE
\ No newline at end of file
+        """Get the current fee rate, as last computed by the refresh task."""
+        return self.current_fee_rate
+
+    def get_fee_rate_for(self, priority):
+        """Get the current fee rate scaled for a priority level."""
+        return self.priority_rates.get(priority, self.current_fee_rate)
\ No newline at end of file
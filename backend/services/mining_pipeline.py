@@ -0,0 +1,129 @@
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from models.blockchain import Blockchain
+from models.transaction import Transaction
+from models.transaction_pool import TransactionPool
+
+logger = logging.getLogger(__name__)
+
+class MiningPipeline:
+    """Two-stage mining pipeline: mine a block, then persist and broadcast it.
+
+    The stages are connected by small bounded queues, so block N+1 can be
+    validated and mined while block N is still being written to DuckDB, and a
+    burst of /mine requests gets backpressure instead of an unbounded backlog.
+    Broadcasting only hands the block to the P2P loop, so no request waits on
+    peers.
+    """
+
+    def __init__(self, blockchain: Blockchain, transaction_pool: TransactionPool, pubsub, validation_executor, queue_size=4):
+        self.blockchain = blockchain
+        self.transaction_pool = transaction_pool
+        self.pubsub = pubsub
+        self.validation_executor = validation_executor
+        self.queue_size = queue_size
+        self.mine_queue = None
+        self.publish_queue = None
+        self.workers = []
+        self.chain_executor = None
+
+    async def start(self):
+        """Create the stage queues and start one worker per stage on the running loop."""
+        self.mine_queue = asyncio.Queue(maxsize=self.queue_size)
+        self.publish_queue = asyncio.Queue(maxsize=self.queue_size)
+        # One worker, so blocks are mined and appended strictly in job order
+        self.chain_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="mining")
+        self.workers = [
+            asyncio.create_task(self.mine_worker()),
+            asyncio.create_task(self.publish_worker()),
+        ]
+        logger.info("Mining pipeline started")
+
+    async def stop(self):
+        """Let queued jobs drain through both stages, then stop the workers."""
+        if not self.workers:
+            return
+        await self.mine_queue.join()
+        await self.publish_queue.join()
+        for worker in self.workers:
+            worker.cancel()
+        await asyncio.gather(*self.workers, return_exceptions=True)
+        self.workers = []
+        self.chain_executor.shutdown(wait=True)
+        self.chain_executor = None
+        logger.info("Mining pipeline stopped")
+
+    async def submit(self, miner_address, wallet):
+        """Queue a mining job and wait until its block has been persisted and queued for broadcast."""
+        if not self.workers:
+            raise RuntimeError("Mining pipeline is not running")
+        future = asyncio.get_running_loop().create_future()
+        await self.mine_queue.put((miner_address, wallet, future))
+        return await future
+
+    async def validate_transactions(self, transactions):
+        """Verify signatures on the shared pool so they run off the event loop and in parallel."""
+        loop = asyncio.get_running_loop()
+        results = await asyncio.gather(
+            *(loop.run_in_executor(self.validation_executor, Transaction.is_valid, tx) for tx in transactions),
+            return_exceptions=True
+        )
+        valid_transactions = []
+        for tx, result in zip(transactions, results):
+            if isinstance(result, Exception):
+                logger.warning("Invalid transaction %s skipped: %s", tx.id, result)
+            else:
+                valid_transactions.append(tx)
+        return valid_transactions
+
+    def mine_block(self, miner_address, transactions):
+        """Mine a block over `transactions` and clear them from the pool; runs on the chain executor."""
+        total_fees = sum(tx.fee for tx in transactions)
+        coinbase_tx = Transaction.create_coinbase(miner_address, self.blockchain.current_height + 1, total_fees)
+        new_block = self.blockchain.add_block([coinbase_tx] + transactions)
+        # Cleared before the next job picks transactions, so they can't be mined twice
+        self.transaction_pool.clear_block_transactions([new_block])
+        return new_block, coinbase_tx
+
+    async def mine_worker(self):
+        """Stage 1: pick and validate transactions, mine the block and clear them from the pool."""
+        while True:
+            miner_address, wallet, future = await self.mine_queue.get()
+            try:
+                transactions = self.transaction_pool.get_priority_transactions(limit=10)
+                valid_transactions = await self.validate_transactions(transactions)
+                # The proof-of-work loop is CPU-bound; running it here would stall every request on the loop
+                new_block, coinbase_tx = await asyncio.get_running_loop().run_in_executor(
+                    self.chain_executor, self.mine_block, miner_address, valid_transactions
+                )
+                await self.publish_queue.put((new_block, coinbase_tx, miner_address, wallet, future))
+            except Exception as e:
+                logger.error(f"Error mining block: {str(e)}")
+                if not future.done():
+                    future.set_exception(e)
+            finally:
+                self.mine_queue.task_done()
+
+    async def publish_worker(self):
+        """Stage 2: persist and broadcast a mined block, then resolve the waiting request."""
+        while True:
+            new_block, coinbase_tx, miner_address, wallet, future = await self.publish_queue.get()
+            try:
+                await asyncio.to_thread(self.pubsub.save_block_to_db, new_block)
+                # Only hands the block to the P2P loop; peers are sent it by their own sender tasks
+                self.pubsub.broadcast_block_sync(new_block)
+                confirmed_balance = wallet.calculate_balance(self.blockchain, wallet.address)
+                if not future.done():
+                    future.set_result({
+                        "message": "Block mined successfully",
+                        "block": new_block.to_json(),
+                        "reward": coinbase_tx.output[miner_address],
+                        "confirmed_balance": confirmed_balance
+                    })
+            except Exception as e:
+                logger.error(f"Error publishing block {new_block.height}: {str(e)}")
+                if not future.done():
+                    future.set_exception(e)
+            finally:
+                self.publish_queue.task_done()
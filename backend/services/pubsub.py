@@ -1,26 +1,44 @@
 import asyncio
+import collections
+import functools
 import websockets
 import json
 import logging
 import uuid
 import os
+import random
 import socket
 import time
 import duckdb
 import gzip
 import aiohttp
+import orjson
+from concurrent.futures import ThreadPoolExecutor
 from websockets.exceptions import ConnectionClosedError
 from models.block import Block
 from models.blockchain import Blockchain
 from models.transaction import Transaction
 from models.transaction_pool import TransactionPool
 from core.config import BOOT_NODE
+from utils.json_codec import encode_json, decode_json, encode_message, decode_message
+from utils.bloom_filter import RotatingBloomFilter
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# gzip's default level 9 costs several times the CPU of 6 on large chain messages for a few percent smaller output
+GZIP_LEVEL = 6
+
+# libuv-backed event loop for the P2P layer; uvloop is unavailable on Windows
+try:
+    import uvloop
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+except ImportError:
+    logger.info("uvloop not installed, using the default asyncio event loop")
+
+@functools.lru_cache(maxsize=1)
 def get_public_ip():
-    """Get the public IP address of the current machine."""
+    """Get the public IP address of the current machine (looked up once per process)."""
     try:
         s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
         s.connect(("8.8.8.8", 80))
@@ -32,22 +50,36 @@ def get_public_ip():
 
 class PubSub:
     def __init__(self, blockchain, transaction_pool):
-        host = os.environ.get('HOST', get_public_ip())
         self.blockchain = blockchain
         self.transaction_pool = transaction_pool
         self.node_id = str(uuid.uuid4())
+        self.message_prefixes = {}  # msg type -> encoded envelope head, see message_prefix
         self.peer_nodes = {}  # uri -> websocket
+        self.peer_outboxes = {}  # uri -> (outbound asyncio.Queue, sender task)
+        self.peer_queue_size = 256  # Queued messages per peer before the oldest are dropped
         self.known_peers = set()
         self.peers_file = "peers.json"
+        self.peers_dirty = False  # known_peers changed since the last flush
+        self.peers_flush_interval = 1.0  # Seconds between peer-file flushes
         self.boot_node_uri = BOOT_NODE
         self.max_retries = 3
+        self.discovery_interval = 300  # Seconds between peer discovery rounds after the startup one
+        self.boot_node_task = None  # Live boot node registration, so discovery rounds don't open a second one
         self.websocket_port = 5001 if os.environ.get('PEER') != 'True' else 6001
-        self.my_uri = f"ws://{host}:{self.websocket_port}"
         self.server = None
         self.loop = None
-        self.processed_transactions = set()  # Track processed transaction IDs
+        self.pending_tasks = set()  # Strong refs to background tasks until they finish
+        self.processed_transactions = RotatingBloomFilter(capacity=100_000, error_rate=1e-6)  # Track processed transaction IDs
+        self.relayed = collections.OrderedDict()  # hash() of recently relayed block hashes / (tx id, timestamp), oldest first
+        self.relayed_size = 10_000
+        self.pending_relays = {}  # source websocket -> encoded transactions waiting for the relay window
+        self.relay_timer = None
+        self.relay_window = 0.05  # Seconds relayed transactions are held so a burst shares one frame
         self.syncing_chain = False
-        self.blocks_in_transit = set()
+        self.chain_lock = asyncio.Lock()  # Serializes chain replacements from concurrent peer responses
+        self.chain_executor = ThreadPoolExecutor(max_workers=1)  # Replays received chains off the event loop
+        self.chain_snapshot = None  # (chain length, tip hash, encoded RESPONSE_CHAIN message)
+        self.tx_pool_snapshot = None  # (pool version, encoded RESPONSE_TX_POOL message)
         self.tx_pool_syncing = False  # Track transaction pool sync state
         self.last_tx_pool_request = 0  # Timestamp of last MSG_REQUEST_TX_POOL
         self.tx_pool_request_cooldown = 5  # Seconds between requests
@@ -77,6 +109,26 @@ class PubSub:
         self.MSG_RESPONSE_BLOCKS = "RESPONSE_BLOCKS"
         self.MSG_REQUEST_TX = "REQUEST_TX"
         self.MSG_RESPONSE_TX = "RESPONSE_TX"
+        self.MSG_REQUEST_TX_BATCH = "REQUEST_TX_BATCH"
+        self.MSG_NEW_TX_BATCH = "NEW_TX_BATCH"
+        # Message type -> handler, so dispatch is a single dict lookup
+        self.message_handlers = {
+            self.MSG_NEW_BLOCK: self.handle_new_block,
+            self.MSG_NEW_TX: self.handle_new_tx,
+            self.MSG_REQUEST_CHAIN: self.handle_request_chain,
+            self.MSG_RESPONSE_CHAIN: self.handle_response_chain,
+            self.MSG_REQUEST_TX_POOL: self.handle_request_tx_pool,
+            self.MSG_RESPONSE_TX_POOL: self.handle_response_tx_pool,
+            self.MSG_PEER_LIST: self.handle_peer_list,
+            self.MSG_REQUEST_CHAIN_LENGTH: self.handle_request_chain_length,
+            self.MSG_RESPONSE_CHAIN_LENGTH: self.handle_response_chain_length,
+            self.MSG_REQUEST_BLOCKS: self.handle_request_blocks,
+            self.MSG_RESPONSE_BLOCKS: self.handle_response_blocks,
+            self.MSG_REQUEST_TX: self.handle_request_tx,
+            self.MSG_RESPONSE_TX: self.handle_response_tx,
+            self.MSG_REQUEST_TX_BATCH: self.handle_request_tx_batch,
+            self.MSG_NEW_TX_BATCH: self.handle_new_tx_batch,
+        }
 
     def initialize_db(self):
         """Initialize DuckDB table for blockchain storage."""
@@ -158,11 +210,11 @@ class PubSub:
 
     def compress_data(self, data):
         """Compress data using gzip."""
-        return gzip.compress(json.dumps(data).encode('utf-8'))
+        return gzip.compress(encode_json(data))
 
     def decompress_data(self, compressed_data):
         """Decompress data using gzip."""
-        return json.loads(gzip.decompress(compressed_data).decode('utf-8'))
+        return decode_json(gzip.decompress(compressed_data))
 
     def update_peer_reliability(self, uri, success=True):
         """Update peer reliability score."""
@@ -179,23 +231,110 @@ class PubSub:
         """Adjust chunk size based on sync success."""
         if success:
             self.chunk_size = min(self.max_chunk_size, self.chunk_size + self.chunk_size_increment)
-            logger.debug(f"Increased chunk size to {self.chunk_size}")
+            logger.debug("Increased chunk size to %s", self.chunk_size)
         else:
             self.chunk_size = max(self.min_chunk_size, self.chunk_size - self.chunk_size_decrement)
-            logger.debug(f"Decreased chunk size to {self.chunk_size}")
+            logger.debug("Decreased chunk size to %s", self.chunk_size)
+
+    @functools.cached_property
+    def my_uri(self):
+        """This node's advertised URI, resolved on first use instead of when the module is imported."""
+        host = os.environ.get('HOST') or get_public_ip()
+        return f"ws://{host}:{self.websocket_port}"
+
+    def spawn(self, coro):
+        """Run a coroutine in the background, keeping a reference until it finishes."""
+        task = asyncio.create_task(coro)
+        self.pending_tasks.add(task)
+        task.add_done_callback(self.pending_tasks.discard)
+        return task
 
     def create_message(self, msg_type, data):
         """Create a JSON formatted message with compression."""
-        message = {"type": msg_type, "data": data, "from": self.node_id}
-        compressed_data = self.compress_data(message)
-        return compressed_data
+        return gzip.compress(encode_message(msg_type, data, self.node_id), compresslevel=GZIP_LEVEL)
+
+    def create_encoded_message(self, msg_type, encoded_data):
+        """Create a message whose data is already JSON-encoded bytes."""
+        return gzip.compress(self.message_prefix(msg_type) + encoded_data + b'}', compresslevel=GZIP_LEVEL)
+
+    def message_prefix(self, msg_type):
+        """Encoded envelope head up to the data field; type and sender are fixed, so it's built once per type."""
+        prefix = self.message_prefixes.get(msg_type)
+        if prefix is None:
+            prefix = encode_json({"type": msg_type, "from": self.node_id})[:-1] + b',"data":'
+            self.message_prefixes[msg_type] = prefix
+        return prefix
+
+    def transaction_message(self, transaction, msg_type=None):
+        """Transaction message (NEW_TX by default), reusing the encoding made when it entered the pool."""
+        msg_type = msg_type or self.MSG_NEW_TX
+        encoded = self.transaction_pool.encoded_map.get(transaction.id)
+        if encoded is None:
+            return self.create_message(msg_type, transaction.to_json())
+        return self.create_encoded_message(msg_type, encoded)
+
+    @staticmethod
+    def encode_blocks(blocks):
+        """JSON array of blocks, spliced from each block's cached encoding in one buffer."""
+        return b'[' + b','.join(block.to_json_bytes() for block in blocks) + b']'
+
+    async def apply_chain(self, chain, new_blocks):
+        """Adopt a received chain and persist its new blocks on the chain worker thread."""
+        # One worker plus the lock keeps replacements in arrival order while the loop keeps servicing peers
+        async with self.chain_lock:
+            await asyncio.get_running_loop().run_in_executor(self.chain_executor, self.replace_chain_blocking, chain, new_blocks)
+
+    def replace_chain_blocking(self, chain, new_blocks):
+        """Replace the chain, save the new blocks and drop their transactions from the pool."""
+        # replace_chain swaps in a freshly built UTXO set, so the current one is left intact for its rollback
+        self.blockchain.replace_chain(chain)
+        for block in new_blocks:
+            self.save_block_to_db(block)
+        # Pooled transactions were never in the old chain, so only the new blocks can confirm them
+        self.transaction_pool.clear_block_transactions(new_blocks)
+
+    @staticmethod
+    def decode_blocks(blocks_data):
+        """Rebuild Block objects from received block dicts."""
+        return [Block.from_json(block_data) for block_data in blocks_data]
+
+    @staticmethod
+    def decode_valid_blocks(blocks_data):
+        """Rebuild received blocks, skipping any that carry an invalid transaction."""
+        blocks = []
+        for block_data in blocks_data:
+            try:
+                block = Block.from_json(block_data)
+                for tx_json in block.data:
+                    tx = Transaction.from_json(tx_json)
+                    Transaction.is_valid(tx)
+                blocks.append(block)
+            except Exception as e:
+                logger.warning(f"Skipping invalid block: {e}")
+        return blocks
+
+    def chain_snapshot_message(self):
+        """Encoded RESPONSE_CHAIN message, rebuilt only when the chain tip changes."""
+        chain = self.blockchain.chain
+        if self.chain_snapshot is None or self.chain_snapshot[:2] != (len(chain), chain[-1].hash):
+            message = self.create_encoded_message(self.MSG_RESPONSE_CHAIN, self.encode_blocks(chain))
+            self.chain_snapshot = (len(chain), chain[-1].hash, message)
+        return self.chain_snapshot[2]
+
+    def tx_pool_snapshot_message(self):
+        """Encoded RESPONSE_TX_POOL message, rebuilt only when the pool changes."""
+        version = self.transaction_pool.version
+        if self.tx_pool_snapshot is None or self.tx_pool_snapshot[0] != version:
+            message = self.create_encoded_message(self.MSG_RESPONSE_TX_POOL, self.transaction_pool.encoded_transaction_data())
+            self.tx_pool_snapshot = (version, message)
+        return self.tx_pool_snapshot[1]
 
     def parse_message(self, message):
-        """Parse and decompress incoming message."""
+        """Parse and decompress incoming message into an Envelope."""
         try:
             if isinstance(message, bytes):
-                return self.decompress_data(message)
-            return json.loads(message)
+                message = gzip.decompress(message)
+            return decode_message(message)
         except Exception as e:
             logger.error(f"Error parsing message: {e}")
             raise json.JSONDecodeError("Invalid message", message, 0)
@@ -203,17 +342,37 @@ class PubSub:
     def save_peers(self):
         """Save the list of known peers to a file."""
         try:
-            with open(self.peers_file, "w") as f:
-                json.dump(list(self.known_peers), f)
+            self.write_peers_file(orjson.dumps(list(self.known_peers)))
         except Exception as e:
             logger.error(f"Error saving peers: {e}")
 
+    def write_peers_file(self, data):
+        """Write the peer list through a temp file so readers never see a partial file."""
+        tmp_file = self.peers_file + ".tmp"
+        with open(tmp_file, "wb") as f:
+            f.write(data)
+        os.replace(tmp_file, self.peers_file)
+
+    async def flush_peers(self):
+        """Persist known peers at most once per interval while they are dirty."""
+        while True:
+            await asyncio.sleep(self.peers_flush_interval)
+            if not self.peers_dirty:
+                continue
+            self.peers_dirty = False
+            try:
+                data = orjson.dumps(list(self.known_peers))
+                await asyncio.to_thread(self.write_peers_file, data)
+            except Exception as e:
+                self.peers_dirty = True
+                logger.error(f"Error saving peers: {e}")
+
     def load_peers(self):
         """Load the list of known peers from a file."""
         try:
             if os.path.exists(self.peers_file):
-                with open(self.peers_file, "r") as f:
-                    peers = json.load(f)
+                with open(self.peers_file, "rb") as f:
+                    peers = orjson.loads(f.read())
                     return set(peers)
             return set()
         except Exception as e:
@@ -229,7 +388,7 @@ class PubSub:
                     if response.status == 200:
                         compressed_data = await response.read()
                         blocks_data = self.decompress_data(compressed_data)
-                        blocks = [Block.from_json(block_data) for block_data in blocks_data]
+                        blocks = await asyncio.to_thread(self.decode_blocks, blocks_data)
                         self.update_peer_reliability(uri, success=True)
                         self.adjust_chunk_size(success=True)
                         return blocks
@@ -264,14 +423,13 @@ class PubSub:
         for uri, response in zip(self.peer_nodes.keys(), responses):
             if isinstance(response, int) and response > local_length:
                 chains[uri] = response
-                logger.debug(f"Peer {uri} has chain length {response}")
+                logger.debug("Peer %s has chain length %s", uri, response)
 
         if not chains:
             logger.info("No peers have a longer chain")
             return
 
         #   If only one peer is available, request the entire chain from them
-        print(len(chains))
         if len(chains) == 1:
             selected_peer = list(chains.keys())[0]
             if selected_peer == self.my_uri:  #   Check if it's not self before proceeding
@@ -280,19 +438,15 @@ class PubSub:
             logger.info(f"Only one peer available ({selected_peer}), requesting full chain")
             try:
                 #   Request the entire chain from the single peer
-                async with websockets.connect(selected_peer) as ws:
+                async with websockets.connect(selected_peer, compression=None) as ws:
                     await ws.send(self.create_message(self.MSG_REQUEST_CHAIN, None))
                     response = await ws.recv()
                     msg = self.parse_message(response)
-                    if msg['type'] == self.MSG_RESPONSE_CHAIN:
-                        received_chain = [Block.from_json(block_data) for block_data in msg['data']]
+                    if msg.type == self.MSG_RESPONSE_CHAIN:
+                        received_chain = await asyncio.to_thread(self.decode_blocks, msg.data)
                         if len(received_chain) > len(self.blockchain.chain):
                             logger.info(f"Received full chain of length {len(received_chain)} from {selected_peer}")
-                            self.blockchain.utxo_set.clear()
-                            self.blockchain.replace_chain(received_chain)
-                            for block in received_chain:
-                                self.save_block_to_db(block)
-                            self.transaction_pool.clear_blockchain_transactions(self.blockchain)
+                            await self.apply_chain(received_chain, received_chain)
                             logger.info(f"Successfully synced full chain from {selected_peer}")
                             return
             except Exception as e:
@@ -308,7 +462,7 @@ class PubSub:
             missing_blocks = []
             while start_index < longest_length:
                 end_index = min(start_index + self.chunk_size, longest_length)
-                logger.debug(f"Fetching blocks {start_index} to {end_index-1} from {selected_peer}")
+                logger.debug("Fetching blocks %s to %s from %s", start_index, end_index-1, selected_peer)
                 blocks = await self.fetch_blocks_from_peer(selected_peer, start_index, end_index)
                 if blocks:
                     missing_blocks.extend(blocks)
@@ -323,11 +477,7 @@ class PubSub:
             if missing_blocks:
                 potential_chain = local_chain + missing_blocks
                 try:
-                    self.blockchain.utxo_set.clear()
-                    self.blockchain.replace_chain(potential_chain)
-                    for block in missing_blocks:
-                        self.save_block_to_db(block)
-                    self.transaction_pool.clear_blockchain_transactions(self.blockchain)
+                    await self.apply_chain(potential_chain, missing_blocks)
                     logger.info(f"Synced {len(missing_blocks)} missing blocks, new chain length: {len(self.blockchain.chain)}")
                     if not self.tx_pool_syncing and time.time() - self.last_tx_pool_request > self.tx_pool_request_cooldown:
                         self.tx_pool_syncing = True
@@ -355,7 +505,7 @@ class PubSub:
             for uri, response in zip(self.peer_nodes.keys(), responses):
                 if isinstance(response, int) and response > local_length:
                     chains[uri] = response
-                    logger.debug(f"Peer {uri} has chain length {response}")
+                    logger.debug("Peer %s has chain length %s", uri, response)
             if not chains:
                 logger.info("No peers have a longer chain")
                 return
@@ -368,7 +518,7 @@ class PubSub:
             missing_blocks = []
             while start_index < longest_length:
                 end_index = min(start_index + self.chunk_size, longest_length)
-                logger.debug(f"Fetching...")
+                logger.debug("Fetching...")
             """Synchronize blockchain with peers, fetching chunks in parallel."""
             local_chain = self.load_blockchain_from_db()
             try:
@@ -389,31 +539,26 @@ class PubSub:
             for uri, response in zip(self.peer_nodes.keys(), responses):
                 if isinstance(response, int) and response > local_length:
                     chains[uri] = response
-                    logger.debug(f"Peer {uri} has chain length {response}")
+                    logger.debug("Peer %s has chain length %s", uri, response)
 
             if not chains:
                 logger.info("No peers have a longer chain")
                 return
 
-            print(len(chains))
             if len(chains) == 1:
                 selected_peer = list(chains.keys())[0]
                 logger.info(f"Only one peer available ({selected_peer}), requesting full chain")
                 try:
                     # Request the entire chain from the single peer
-                    async with websockets.connect(selected_peer) as ws:
+                    async with websockets.connect(selected_peer, compression=None) as ws:
                         await ws.send(self.create_message(self.MSG_REQUEST_CHAIN, None))
                         response = await ws.recv()
                         msg = self.parse_message(response)
-                        if msg['type'] == self.MSG_RESPONSE_CHAIN:
-                            received_chain = [Block.from_json(block_data) for block_data in msg['data']]
+                        if msg.type == self.MSG_RESPONSE_CHAIN:
+                            received_chain = await asyncio.to_thread(self.decode_blocks, msg.data)
                             if len(received_chain) > len(self.blockchain.chain):
                                 logger.info(f"Received full chain of length {len(received_chain)} from {selected_peer}")
-                                self.blockchain.utxo_set.clear()
-                                self.blockchain.replace_chain(received_chain)
-                                for block in received_chain:
-                                    self.save_block_to_db(block)
-                                self.transaction_pool.clear_blockchain_transactions(self.blockchain)
+                                await self.apply_chain(received_chain, received_chain)
                                 logger.info(f"Successfully synced full chain from {selected_peer}")
                                 return
                 except Exception as e:
@@ -429,7 +574,7 @@ class PubSub:
             missing_blocks = []
             while start_index < longest_length:
                 end_index = min(start_index + self.chunk_size, longest_length)
-                logger.debug(f"Fetching blocks {start_index} to {end_index-1} from {selected_peer}")
+                logger.debug("Fetching blocks %s to %s from %s", start_index, end_index-1, selected_peer)
                 blocks = await self.fetch_blocks_from_peer(selected_peer, start_index, end_index)
                 if blocks:
                     missing_blocks.extend(blocks)
@@ -445,11 +590,7 @@ class PubSub:
             if missing_blocks:
                 potential_chain = local_chain + missing_blocks
                 try:
-                    self.blockchain.utxo_set.clear()
-                    self.blockchain.replace_chain(potential_chain)
-                    for block in missing_blocks:
-                        self.save_block_to_db(block)
-                    self.transaction_pool.clear_blockchain_transactions(self.blockchain)
+                    await self.apply_chain(potential_chain, missing_blocks)
                     logger.info(f"Synced {len(missing_blocks)} missing blocks, new chain length: {len(self.blockchain.chain)}")
                     if not self.tx_pool_syncing and time.time() - self.last_tx_pool_request > self.tx_pool_request_cooldown:
                         self.tx_pool_syncing = True
@@ -479,7 +620,7 @@ class PubSub:
                 for uri, response in zip(self.peer_nodes.keys(), responses):
                     if isinstance(response, int) and response > local_length:
                         chains[uri] = response
-                        logger.debug(f"Peer {uri} has chain length {response}")
+                        logger.debug("Peer %s has chain length %s", uri, response)
 
                 if not chains:
                     logger.info("No peers have a longer chain")
@@ -495,7 +636,7 @@ class PubSub:
                 missing_blocks = []
                 while start_index < longest_length:
                     end_index = min(start_index + self.chunk_size, longest_length)
-                    logger.debug(f"Fetching blocks {start_index} to {end_index-1} from {selected_peer}")
+                    logger.debug("Fetching blocks %s to %s from %s", start_index, end_index-1, selected_peer)
                     blocks = await self.fetch_blocks_from_peer(selected_peer, start_index, end_index)
                     if blocks:
                         missing_blocks.extend(blocks)
@@ -511,11 +652,7 @@ class PubSub:
                 if missing_blocks:
                     potential_chain = local_chain + missing_blocks
                     try:
-                        self.blockchain.utxo_set.clear()
-                        self.blockchain.replace_chain(potential_chain)
-                        for block in missing_blocks:
-                            self.save_block_to_db(block)
-                        self.transaction_pool.clear_blockchain_transactions(self.blockchain)
+                        await self.apply_chain(potential_chain, missing_blocks)
                         logger.info(f"Synced {len(missing_blocks)} missing blocks, new chain length: {len(self.blockchain.chain)}")
                         # Request tx pool to ensure sync
                         if not self.tx_pool_syncing and time.time() - self.last_tx_pool_request > self.tx_pool_request_cooldown:
@@ -542,281 +679,375 @@ class PubSub:
         """Handle incoming messages based on their type."""
         try:
             msg = self.parse_message(message)
-            msg_type = msg['type']
+            msg_type = msg.type
             logger.info(f"Received message type: {msg_type}")
-            from_id = msg.get('from', 'unknown')
-            logger.debug(f"Received message of type {msg_type} from {from_id}")
-            data = msg['data']
-            peer_uri = f"ws://{websocket.remote_address[0]}:{websocket.remote_address[1]}"
+            logger.debug("Received message of type %s from %s", msg_type, msg.sender)
+            handler = self.message_handlers.get(msg_type)
+            if handler is not None:
+                await handler(msg.data, websocket)
+        except json.JSONDecodeError:
+            logger.error(f"Invalid JSON message received: {message}")
+        except Exception as e:
+            logger.error(f"Error handling message: {e}")
 
-            if msg_type == self.MSG_NEW_BLOCK:
-                block = Block.from_json(data)
-                last_block = self.blockchain.chain[-1]
-                if block.hash == last_block.hash:
-                    logger.info("Duplicate block received. Skipping.")
-                    return
-                potential_chain = self.blockchain.chain[:]
-                potential_chain.append(block)
+    def already_relayed(self, key):
+        """Whether a block or transaction version was relayed recently, so a repeat can be dropped unparsed."""
+        key = hash(key)
+        if key in self.relayed:
+            self.relayed.move_to_end(key)
+            return True
+        return False
+
+    def remember_relayed(self, key):
+        """Record a relayed block or transaction version, evicting the oldest past relayed_size."""
+        # Stored as a 64-bit hash rather than the id strings; a collision only skips one relay
+        self.relayed[hash(key)] = None
+        if len(self.relayed) > self.relayed_size:
+            self.relayed.popitem(last=False)
+
+    async def handle_new_block(self, data, websocket):
+        """Validate a gossiped block against the UTXO set and extend the chain with it."""
+        # Checked before the block is rebuilt: in a mesh every neighbour relays the same block back
+        block_hash = data.get('hash')
+        if block_hash in self.blockchain.by_hash or self.already_relayed(block_hash):
+            logger.info("Duplicate block received. Skipping.")
+            return
+        block = Block.from_json(data)
+        potential_chain = self.blockchain.chain[:]
+        potential_chain.append(block)
+        try:
+            # The inputs are read straight from the block's transaction dicts; full Transaction
+            # objects are only rebuilt later, when the chain itself is validated
+            utxo_set = self.blockchain.utxo_set
+            missing_tx_ids = []
+            for tx_json in block.data:
+                input_data = tx_json['input']
+                input_address = input_data.get('address')
+                if tx_json.get('is_coinbase', input_address == 'coinbase'):
+                    continue
+                utxo_amount = 0
+                for prev_tx_id in input_data.get('prev_tx_ids', []):
+                    amount = utxo_set.get(prev_tx_id, {}).get(input_address)
+                    if amount is None:
+                        missing_tx_ids.append(prev_tx_id)
+                    else:
+                        utxo_amount += amount
+                input_amount = input_data.get('amount', 0)
+                if not missing_tx_ids and input_amount > utxo_amount:
+                    raise ValueError(f"Invalid transaction input: input amount {input_amount} exceeds UTXO amount {utxo_amount}")
+            if missing_tx_ids:
+                # One request for every unknown input instead of a round trip per missing transaction
+                await websocket.send(self.create_message(self.MSG_REQUEST_TX_BATCH, missing_tx_ids))
+                logger.info(f"Requested {len(missing_tx_ids)} missing transactions")
+                return
+            await self.apply_chain(potential_chain, [block])
+            self.remember_relayed(block.hash)
+            await self.broadcast(self.create_encoded_message(self.MSG_NEW_BLOCK, block.to_json_bytes()), exclude=websocket)
+        except Exception as e:
+            logger.error(f"Failed to replace chain: {e}")
+
+    async def handle_new_tx(self, data, websocket):
+        """Add or update a gossiped transaction in the pool and relay it."""
+        relay_key = (data.get('id'), data.get('input', {}).get('timestamp'))
+        if self.already_relayed(relay_key):
+            logger.debug("Transaction %s already relayed, skipping", relay_key[0])
+            return
+        transaction = Transaction.from_json(data)
+        tx_id = transaction.id
+        tx_time = transaction.input.get('timestamp', 0)
+        logger.debug("Transaction ID: %s, Timestamp: %s", tx_id, tx_time)
+        existing_tx = self.transaction_pool.transaction_map.get(tx_id)
+        if existing_tx:
+            logger.debug("Existing transaction found: %s", existing_tx.input['timestamp'])
+            if tx_time > existing_tx.input['timestamp']:
                 try:
-                    for tx_json in block.data:
-                        tx = Transaction.from_json(tx_json)
-                        if not tx.is_coinbase:
-                            input_data = tx.input
-                            prev_tx_ids = input_data.get('prev_tx_ids', [])
-                            input_address = input_data.get('address')
-                            input_amount = input_data.get('amount', 0)
-                            utxo_amount = 0
-                            for prev_tx_id in prev_tx_ids:
-                                if prev_tx_id not in self.blockchain.utxo_set or input_address not in self.blockchain.utxo_set[prev_tx_id]:
-                                    await websocket.send(self.create_message(self.MSG_REQUEST_TX, prev_tx_id))
-                                    logger.info(f"Requested missing transaction {prev_tx_id}")
-                                    return
-                                utxo_amount += self.blockchain.utxo_set[prev_tx_id].get(input_address, 0)
-                            if input_amount > utxo_amount:
-                                raise ValueError(f"Invalid transaction input: input amount {input_amount} exceeds UTXO amount {utxo_amount}")
-                    self.blockchain.replace_chain(potential_chain)
-                    self.save_block_to_db(block)  # Save new block to DuckDB
-                    self.transaction_pool.clear_blockchain_transactions(self.blockchain)
-                    await self.broadcast(self.create_message(self.MSG_NEW_BLOCK, data), exclude=websocket)
+                    Transaction.is_valid(transaction)
+                    self.transaction_pool.set_transaction(transaction, already_validated=True)
+                    self.remember_relayed(relay_key)
+                    self.queue_relay(transaction, websocket)
+                    if time.time() - self.last_tx_pool_request > self.tx_pool_request_cooldown:
+                        self.tx_pool_syncing = True
+                        await self.broadcast(self.create_message(self.MSG_REQUEST_TX_POOL, None))
+                        self.last_tx_pool_request = time.time()
                 except Exception as e:
-                    logger.error(f"Failed to replace chain: {e}")
+                    logger.error(f"Failed to update transaction {tx_id}: {e}")
+        elif tx_id not in self.processed_transactions:
+            try:
+                Transaction.is_valid(transaction)
+                self.transaction_pool.set_transaction(transaction, already_validated=True)
+                self.processed_transactions.add(tx_id)
+                self.remember_relayed(relay_key)
+                self.queue_relay(transaction, websocket)
+                if time.time() - self.last_tx_pool_request > self.tx_pool_request_cooldown:
+                    self.tx_pool_syncing = True
+                    await self.broadcast(self.create_message(self.MSG_REQUEST_TX_POOL, None))
+                    self.last_tx_pool_request = time.time()
+            except Exception as e:
+                logger.error(f"Failed to add transaction {tx_id}: {e}")
+
+    async def handle_new_tx_batch(self, data, websocket):
+        """Process each transaction of a relayed batch as if it had arrived in its own NEW_TX."""
+        for tx_json in data:
+            try:
+                await self.handle_new_tx(tx_json, websocket)
+            except Exception as e:
+                logger.error(f"Failed to process batched transaction: {e}")
 
-            if msg_type == self.MSG_NEW_TX:
-                transaction = Transaction.from_json(data)
+    def queue_relay(self, transaction, source):
+        """Hold a transaction for relay until the window closes, so a burst goes out as one frame per peer."""
+        encoded = self.transaction_pool.encoded_map.get(transaction.id) or encode_json(transaction.to_json())
+        self.pending_relays.setdefault(source, []).append(encoded)
+        if self.relay_timer is None:
+            self.relay_timer = asyncio.get_running_loop().call_later(self.relay_window, self.flush_relays)
+
+    def flush_relays(self):
+        """Broadcast the transactions collected in the relay window, one batch per source peer."""
+        pending, self.pending_relays = self.pending_relays, {}
+        self.relay_timer = None
+        for source, encoded_txs in pending.items():
+            message = self.create_encoded_message(self.MSG_NEW_TX_BATCH, b'[' + b','.join(encoded_txs) + b']')
+            # Grouped by source so nobody is sent back the transactions it relayed to us
+            self.spawn(self.broadcast(message, exclude=source))
+
+    async def handle_request_chain(self, data, websocket):
+        """Send the full chain to the requesting peer."""
+        await websocket.send(self.chain_snapshot_message())
+
+    async def handle_response_chain(self, data, websocket):
+        """Replace the local chain with a longer one received from a peer."""
+        started_sync = False
+        try:
+            # Only a longer chain is decoded, and off the loop so peers keep being serviced meanwhile
+            if len(data) > len(self.blockchain.chain) and not self.syncing_chain:
+                logger.info(f"Received longer chain of length {len(data)}")
+                self.syncing_chain = started_sync = True
+                received_chain = await asyncio.to_thread(self.decode_blocks, data)
+                await self.apply_chain(received_chain, received_chain)
+                if not self.tx_pool_syncing and time.time() - self.last_tx_pool_request > self.tx_pool_request_cooldown:
+                    self.tx_pool_syncing = True
+                    await self.broadcast(self.create_message(self.MSG_REQUEST_TX_POOL, None))
+                    self.last_tx_pool_request = time.time()
+            else:
+                logger.debug("Received chain not longer or syncing, ignoring")
+        except Exception as e:
+            logger.error(f"Failed to replace chain with received chain: {e}")
+        finally:
+            # A response ignored while another sync is decoding must not clear that sync's flag
+            if started_sync:
+                self.syncing_chain = False
+
+    async def handle_request_tx_pool(self, data, websocket):
+        """Send the transaction pool to the requesting peer."""
+        await websocket.send(self.tx_pool_snapshot_message())
+
+    async def handle_response_tx_pool(self, data, websocket):
+        """Merge a peer's transaction pool into the local one."""
+        if not self.tx_pool_syncing:
+            logger.debug("Ignoring RESPONSE_TX_POOL as not syncing")
+            return
+        added_count = 0
+        for tx_data in data:
+            try:
+                transaction = Transaction.from_json(tx_data)
                 tx_id = transaction.id
                 tx_time = transaction.input.get('timestamp', 0)
-                logger.debug(f"Transaction ID: {tx_id}, Timestamp: {tx_time}")
                 existing_tx = self.transaction_pool.transaction_map.get(tx_id)
                 if existing_tx:
-                    logger.debug(f"Existing transaction found: {existing_tx.input['timestamp']}")
                     if tx_time > existing_tx.input['timestamp']:
-                        try:
-                            Transaction.is_valid(transaction)
-                            self.transaction_pool.set_transaction(transaction)
-                            await self.broadcast(self.create_message(self.MSG_NEW_TX, data), exclude=websocket)
-                            if time.time() - self.last_tx_pool_request > self.tx_pool_request_cooldown:
-                                self.tx_pool_syncing = True
-                                await self.broadcast(self.create_message(self.MSG_REQUEST_TX_POOL, None))
-                                self.last_tx_pool_request = time.time()
-                        except Exception as e:
-                            logger.error(f"Failed to update transaction {tx_id}: {e}")
-                elif tx_id not in self.processed_transactions:
-                    try:
                         Transaction.is_valid(transaction)
-                        self.transaction_pool.set_transaction(transaction)
-                        self.processed_transactions.add(tx_id)
-                        await self.broadcast(self.create_message(self.MSG_NEW_TX, data), exclude=websocket)
-                        if time.time() - self.last_tx_pool_request > self.tx_pool_request_cooldown:
-                            self.tx_pool_syncing = True
-                            await self.broadcast(self.create_message(self.MSG_REQUEST_TX_POOL, None))
-                            self.last_tx_pool_request = time.time()
-                    except Exception as e:
-                        logger.error(f"Failed to add transaction {tx_id}: {e}")
-            elif msg_type == self.MSG_REQUEST_CHAIN:
-                chain_data = [block.to_json() for block in self.blockchain.chain]
-                await websocket.send(self.create_message(self.MSG_RESPONSE_CHAIN, chain_data))
+                        self.transaction_pool.set_transaction(transaction, already_validated=True)
+                        added_count += 1
+                elif tx_id not in self.processed_transactions:
+                    Transaction.is_valid(transaction)
+                    self.transaction_pool.set_transaction(transaction, already_validated=True)
+                    self.processed_transactions.add(tx_id)
+                    added_count += 1
+            except Exception as e:
+                logger.error(f"Failed to add or update transaction from peer: {e}")
+        logger.info(f"Successfully added or updated {added_count} transactions to pool from peer")
+        if added_count == 0:
+            self.tx_pool_syncing = False
+        elif time.time() - self.last_tx_pool_request > self.tx_pool_request_cooldown:
+            await self.broadcast(self.create_message(self.MSG_REQUEST_TX_POOL, None))
+            self.last_tx_pool_request = time.time()
 
-            elif msg_type == self.MSG_RESPONSE_CHAIN:
-                try:
-                    received_chain = [Block.from_json(block_data) for block_data in data]
-                    if len(received_chain) > len(self.blockchain.chain) and not self.syncing_chain:
-                        logger.info(f"Received longer chain of length {len(received_chain)}")
-                        self.syncing_chain = True
-                        self.blockchain.utxo_set.clear()
-                        self.blockchain.replace_chain(received_chain)
-                        for block in received_chain:
-                            self.save_block_to_db(block)  # Save received chain to DuckDB
-                        self.transaction_pool.clear_blockchain_transactions(self.blockchain)
-                        if not self.tx_pool_syncing and time.time() - self.last_tx_pool_request > self.tx_pool_request_cooldown:
-                            self.tx_pool_syncing = True
-                            await self.broadcast(self.create_message(self.MSG_REQUEST_TX_POOL, None))
-                            self.last_tx_pool_request = time.time()
-                    else:
-                        logger.debug("Received chain not longer or syncing, ignoring")
-                except Exception as e:
-                    logger.error(f"Failed to replace chain with received chain: {e}")
-                finally:
-                    self.syncing_chain = False
+    async def handle_peer_list(self, data, websocket):
+        """Remember and connect to newly advertised peers."""
+        new_peers = set(data) - self.peer_nodes.keys() - self.known_peers - {self.node_id, self.my_uri}
+        if new_peers:
+            self.known_peers |= new_peers
+            self.peers_dirty = True
+            for peer_uri in new_peers:
+                self.spawn(self.connect_to_peer(peer_uri))
+
+    async def handle_request_chain_length(self, data, websocket):
+        """Reply with the local chain length."""
+        await websocket.send(self.create_message(self.MSG_RESPONSE_CHAIN_LENGTH, len(self.blockchain.chain)))
+
+    async def handle_response_chain_length(self, data, websocket):
+        """Start a block sync if the peer has a longer chain."""
+        peer_length = data
+        local_length = len(self.blockchain.chain)
+        if peer_length > local_length and not self.syncing_chain:
+            await websocket.send(self.create_message(self.MSG_REQUEST_BLOCKS, local_length))
+            self.syncing_chain = True
 
-            elif msg_type == self.MSG_REQUEST_TX_POOL:
-                tx_pool_data = [tx.to_json() for tx in self.transaction_pool.transaction_map.values()]
-                await websocket.send(self.create_message(self.MSG_RESPONSE_TX_POOL, tx_pool_data))
+    async def handle_request_blocks(self, data, websocket):
+        """Send a chunk of blocks (or the whole chain) to the requesting peer."""
+        start_height = data
+        # If start_height is 0, we might be responding to a full chain request
+        if  len(self.peer_nodes) == 1:
+            # Only one peer connected, send the entire chain
+            logger.info(f"Sending full blockchain to peer {websocket.remote_address}")
+            blocks_to_send = self.blockchain.chain[1:]  # Remove genesis block
+             # Remove genesis block
+        else:
+            # Default chunked behavior
+            end_height = min(start_height + self.chunk_size, len(self.blockchain.chain))
+            blocks_to_send = self.blockchain.chain[start_height:end_height]
+            logger.debug("Sending blocks %s to %s to peer %s", start_height, end_height-1, websocket.remote_address)
+
+        await websocket.send(self.create_encoded_message(self.MSG_RESPONSE_BLOCKS, self.encode_blocks(blocks_to_send)))
 
-            elif msg_type == self.MSG_RESPONSE_TX_POOL:
-                if not self.tx_pool_syncing:
-                    logger.debug("Ignoring RESPONSE_TX_POOL as not syncing")
+    async def handle_response_blocks(self, data, websocket):
+        """Append a chunk of synced blocks to the chain."""
+        peer_uri = f"ws://{websocket.remote_address[0]}:{websocket.remote_address[1]}"
+        received_blocks_data = data
+        if received_blocks_data:
+            try:
+                # Decoding and signature checks run off the loop so peers keep being serviced meanwhile
+                received_blocks = await asyncio.to_thread(self.decode_valid_blocks, received_blocks_data)
+                potential_chain = self.blockchain.chain[:]
+                if received_blocks and received_blocks[0].height <= self.blockchain.current_height:
+                    logger.warning(f"Ignoring blocks with invalid height {received_blocks[0].height}")
+                    self.syncing_chain = False
                     return
-                added_count = 0
-                for tx_data in data:
-                    try:
-                        transaction = Transaction.from_json(tx_data)
-                        tx_id = transaction.id
-                        tx_time = transaction.input.get('timestamp', 0)
-                        existing_tx = self.transaction_pool.transaction_map.get(tx_id)
-                        if existing_tx:
-                            if tx_time > existing_tx.input['timestamp']:
-                                Transaction.is_valid(transaction)
-                                self.transaction_pool.set_transaction(transaction)
-                                added_count += 1
-                        elif tx_id not in self.processed_transactions:
-                            Transaction.is_valid(transaction)
-                            self.transaction_pool.set_transaction(transaction)
-                            self.processed_transactions.add(tx_id)
-                            added_count += 1
-                    except Exception as e:
-                        logger.error(f"Failed to add or update transaction from peer: {e}")
-                logger.info(f"Successfully added or updated {added_count} transactions to pool from peer")
-                if added_count == 0:
-                    self.tx_pool_syncing = False
-                elif time.time() - self.last_tx_pool_request > self.tx_pool_request_cooldown:
+                potential_chain += received_blocks
+                logger.debug("Received %s blocks, attempting to replace chain", len(received_blocks))
+                await self.apply_chain(potential_chain, received_blocks)
+                logger.info(f"Replaced chain with {len(potential_chain)} blocks")
+                if not self.tx_pool_syncing and time.time() - self.last_tx_pool_request > self.tx_pool_request_cooldown:
+                    self.tx_pool_syncing = True
                     await self.broadcast(self.create_message(self.MSG_REQUEST_TX_POOL, None))
                     self.last_tx_pool_request = time.time()
+                self.update_peer_reliability(peer_uri, success=True)
+                self.adjust_chunk_size(success=True)
+            except Exception as e:
+                logger.error(f"Error adding received blocks: {e}")
+                self.update_peer_reliability(peer_uri, success=False)
+                self.adjust_chunk_size(success=False)
+        else:
+            logger.warning(f"No blocks received from {peer_uri}")
+            self.update_peer_reliability(peer_uri, success=False)
+            self.adjust_chunk_size(success=False)
+        self.syncing_chain = False
 
-            elif msg_type == self.MSG_PEER_LIST:
-                for peer_uri in data:
-                    if peer_uri != self.node_id and peer_uri != self.my_uri and peer_uri not in self.peer_nodes and peer_uri not in self.known_peers:
-                        self.known_peers.add(peer_uri)
-                        self.save_peers()
-                        asyncio.create_task(self.connect_to_peer(peer_uri))
-
-            elif msg_type == self.MSG_REQUEST_CHAIN_LENGTH:
-                await websocket.send(self.create_message(self.MSG_RESPONSE_CHAIN_LENGTH, len(self.blockchain.chain)))
-
-            elif msg_type == self.MSG_RESPONSE_CHAIN_LENGTH:
-                peer_length = data
-                local_length = len(self.blockchain.chain)
-                if peer_length > local_length and not self.syncing_chain:
-                    await websocket.send(self.create_message(self.MSG_REQUEST_BLOCKS, local_length))
-                    self.syncing_chain = True
-
-            elif msg_type == self.MSG_REQUEST_BLOCKS:
-                start_height = data
-                print(len(self.peer_nodes))
-                # If start_height is 0, we might be responding to a full chain request
-                if  len(self.peer_nodes) == 1:
-                    # Only one peer connected, send the entire chain
-                    logger.info(f"Sending full blockchain to peer {websocket.remote_address}")
-                    blocks_to_send = self.blockchain.chain[1:]  # Remove genesis block
-                     # Remove genesis block
-                else:
-                    # Default chunked behavior
-                    end_height = min(start_height + self.chunk_size, len(self.blockchain.chain))
-                    blocks_to_send = self.blockchain.chain[start_height:end_height]
-                    logger.debug(f"Sending blocks {start_height} to {end_height-1} to peer {websocket.remote_address}")
-                
-                blocks_data = [block.to_json() for block in blocks_to_send]
-                await websocket.send(self.create_message(self.MSG_RESPONSE_BLOCKS, blocks_data))
-
-            elif msg_type == self.MSG_RESPONSE_BLOCKS:
-                received_blocks_data = data
-                if received_blocks_data:
-                    try:
-                        received_blocks = []
-                        for block_data in received_blocks_data:
-                            try:
-                                block = Block.from_json(block_data)
-                                for tx_json in block.data:
-                                    tx = Transaction.from_json(tx_json)
-                                    Transaction.is_valid(tx)
-                                received_blocks.append(block)
-                            except Exception as e:
-                                logger.warning(f"Skipping invalid block: {e}")
-                                continue
-                        potential_chain = self.blockchain.chain[:]
-                        if received_blocks and received_blocks[0].height <= self.blockchain.current_height:
-                            logger.warning(f"Ignoring blocks with invalid height {received_blocks[0].height}")
-                            self.syncing_chain = False
-                            return
-                        potential_chain += received_blocks
-                        logger.debug(f"Received {len(received_blocks)} blocks, attempting to replace chain")
-                        self.blockchain.utxo_set.clear()
-                        self.blockchain.replace_chain(potential_chain)
-                        for block in received_blocks:
-                            self.save_block_to_db(block)
-                        self.transaction_pool.clear_blockchain_transactions(self.blockchain)
-                        logger.info(f"Replaced chain with {len(potential_chain)} blocks")
-                        if not self.tx_pool_syncing and time.time() - self.last_tx_pool_request > self.tx_pool_request_cooldown:
-                            self.tx_pool_syncing = True
-                            await self.broadcast(self.create_message(self.MSG_REQUEST_TX_POOL, None))
-                            self.last_tx_pool_request = time.time()
-                        self.update_peer_reliability(peer_uri, success=True)
-                        self.adjust_chunk_size(success=True)
-                    except Exception as e:
-                        logger.error(f"Error adding received blocks: {e}")
-                        self.update_peer_reliability(peer_uri, success=False)
-                        self.adjust_chunk_size(success=False)
-                else:
-                    logger.warning(f"No blocks received from {peer_uri}")
-                    self.update_peer_reliability(peer_uri, success=False)
-                    self.adjust_chunk_size(success=False)
-                self.syncing_chain = False
-                
-            elif msg_type == self.MSG_REQUEST_TX:
-                tx_id = data
-                tx = self.transaction_pool.transaction_map.get(tx_id)
-                if tx:
-                    await websocket.send(self.create_message(self.MSG_RESPONSE_TX, tx.to_json()))
-                    logger.info(f"Sent transaction {tx_id} to peer")
-                else:
-                    logger.warning(f"Requested transaction {tx_id} not found in pool")
+    async def handle_request_tx(self, data, websocket):
+        """Send a pooled transaction to the requesting peer."""
+        tx_id = data
+        tx = self.transaction_pool.transaction_map.get(tx_id)
+        if tx:
+            await websocket.send(self.create_message(self.MSG_RESPONSE_TX, tx.to_json()))
+            logger.info(f"Sent transaction {tx_id} to peer")
+        else:
+            logger.warning(f"Requested transaction {tx_id} not found in pool")
 
-            elif msg_type == self.MSG_RESPONSE_TX:
-                try:
-                    transaction = Transaction.from_json(data)
-                    tx_id = transaction.id
-                    Transaction.is_valid(transaction)
-                    self.transaction_pool.set_transaction(transaction)
-                    self.processed_transactions.add(tx_id)
-                    logger.info(f"Added transaction {tx_id} from peer")
-                except Exception as e:
-                    logger.error(f"Failed to process received transaction {data.get('id', 'unknown')}: {e}")
+    async def handle_request_tx_batch(self, data, websocket):
+        """Send each requested transaction that is in the pool to the requesting peer."""
+        sent = 0
+        for tx_id in data:
+            tx = self.transaction_pool.transaction_map.get(tx_id)
+            if tx:
+                await websocket.send(self.transaction_message(tx, self.MSG_RESPONSE_TX))
+                sent += 1
+        logger.info(f"Sent {sent} of {len(data)} requested transactions to peer")
 
-        except json.JSONDecodeError:
-            logger.error(f"Invalid JSON message received: {message}")
+    async def handle_response_tx(self, data, websocket):
+        """Add a transaction a peer sent on request to the pool."""
+        try:
+            transaction = Transaction.from_json(data)
+            tx_id = transaction.id
+            Transaction.is_valid(transaction)
+            self.transaction_pool.set_transaction(transaction, already_validated=True)
+            self.processed_transactions.add(tx_id)
+            logger.info(f"Added transaction {tx_id} from peer")
         except Exception as e:
-            logger.error(f"Error handling message: {e}")
+            logger.error(f"Failed to process received transaction {data.get('id', 'unknown')}: {e}")
 
     async def broadcast(self, message, exclude=None):
         """Broadcast a message to all connected peers."""
-        logger.info(f"Broadcasting message to {len(self.peer_nodes)} peers: {list(self.peer_nodes.keys())}")
-        failed_peers = []
-        for uri, peer in list(self.peer_nodes.items()):
-            if peer != exclude:
-                try:
-                    await peer.send(message)
-                    logger.debug(f"Sent message to peer {uri}")
-                    self.update_peer_reliability(uri, success=True)
-                except ConnectionClosedError:
-                    logger.warning(f"Connection closed by peer {uri}, removing")
-                    failed_peers.append(uri)
-                except Exception as e:
-                    logger.error(f"Failed to send message to {uri}: {e}, marking for retry")
-                    failed_peers.append(uri)
-                    self.update_peer_reliability(uri, success=False)
-        for uri in failed_peers:
-            await self.remove_peer(uri)
+        logger.info(f"Broadcasting message to {len(self.peer_nodes)} peers")
+        # Each peer's sender task does the actual send, so a slow link only delays its own queue
+        for uri, peer in self.peer_nodes.items():
+            if peer is not exclude:
+                self.enqueue(uri, message)
         if not self.peer_nodes and not self.tx_pool_syncing and time.time() - self.last_tx_pool_request > self.tx_pool_request_cooldown:
             self.tx_pool_syncing = True
-            asyncio.create_task(self.broadcast(self.create_message(self.MSG_REQUEST_TX_POOL, None)))
+            self.spawn(self.broadcast(self.create_message(self.MSG_REQUEST_TX_POOL, None)))
             self.last_tx_pool_request = time.time()
 
+    def add_peer(self, uri, websocket):
+        """Register a connected peer and start the task that drains its outbound queue."""
+        self.peer_nodes[uri] = websocket
+        previous = self.peer_outboxes.get(uri)
+        if previous is not None:
+            previous[1].cancel()
+        queue = asyncio.Queue(maxsize=self.peer_queue_size)
+        self.peer_outboxes[uri] = (queue, self.spawn(self.peer_sender(uri, websocket, queue)))
+
+    def enqueue(self, uri, message):
+        """Queue a message for one peer, dropping its oldest queued message if the queue is full."""
+        outbox = self.peer_outboxes.get(uri)
+        if outbox is None:
+            # The peer is being removed; its sender is already gone
+            return
+        queue = outbox[0]
+        if queue.full():
+            queue.get_nowait()
+            logger.warning("Outbound queue full for peer %s, dropped oldest message", uri)
+        queue.put_nowait(message)
+
+    async def peer_sender(self, uri, websocket, queue):
+        """Send one peer's queued messages in order until its connection fails."""
+        while True:
+            message = await queue.get()
+            try:
+                await websocket.send(message)
+            except ConnectionClosedError:
+                logger.warning(f"Connection closed by peer {uri}, removing")
+                break
+            except Exception as e:
+                logger.error(f"Failed to send message to {uri}: {e}, removing")
+                self.update_peer_reliability(uri, success=False)
+                break
+            logger.debug("Sent message to peer %s", uri)
+            self.update_peer_reliability(uri, success=True)
+        if self.peer_nodes.get(uri) is websocket:
+            await self.remove_peer(uri)
+
     async def remove_peer(self, uri):
         """Remove a peer from the connected peers list."""
-        if uri in self.peer_nodes:
+        outbox = self.peer_outboxes.pop(uri, None)
+        if outbox is not None and outbox[1] is not asyncio.current_task():
+            outbox[1].cancel()
+        # Inbound peers are keyed by their ephemeral port, so scores of gone peers would pile up forever
+        self.peer_reliability.pop(uri, None)
+        # Unregistered before the close is awaited, so broadcasts running meanwhile skip this peer
+        websocket = self.peer_nodes.pop(uri, None)
+        if websocket is not None:
             try:
-                await self.peer_nodes[uri].close()
+                await websocket.close()
             except:
                 pass
-            del self.peer_nodes[uri]
             self.known_peers.discard(uri)
-            self.save_peers()
+            self.peers_dirty = True
             logger.info(f"Peer {uri} removed from known peers")
 
     async def connection_handler(self, websocket):
         """Handle new WebSocket connections."""
         try:
             peer_uri = f"ws://{websocket.remote_address[0]}:{websocket.remote_address[1]}"
-            self.peer_nodes[peer_uri] = websocket
+            self.add_peer(peer_uri, websocket)
             logger.info(f"New peer connected: {peer_uri}")
             await websocket.send(self.create_message(self.MSG_REQUEST_CHAIN_LENGTH, None))
             if not self.tx_pool_syncing and time.time() - self.last_tx_pool_request > self.tx_pool_request_cooldown:
@@ -832,99 +1063,125 @@ class PubSub:
             logger.error(f"Error in connection handler for {peer_uri}: {e}")
             await self.remove_peer(peer_uri)
 
-    async def register_with_boot_node(self, uri, my_uri, retries=0):
+    def retry_delay(self, attempt):
+        """Exponential backoff with jitter, capped at 30 seconds."""
+        return min(30, 2 ** attempt) + random.random()
+
+    async def register_with_boot_node(self, uri, my_uri):
         """Register with the boot node."""
-        if retries >= self.max_retries:
-            logger.error(f"Max retries reached for boot node {uri}")
-            return
-        try:
-            websocket = await websockets.connect(uri)
-            await websocket.send(self.create_message(self.MSG_REGISTER_PEER, my_uri))
-            async for message in websocket:
-                await self.handle_message(message, websocket)
-        except Exception as e:
-            logger.error(f" He to register with boot node: {e}, retry {retries + 1}/{self.max_retries}")
-            await asyncio.sleep(5)
-            await self.register_with_boot_node(uri, my_uri, retries + 1)
+        for attempt in range(self.max_retries):
+            try:
+                websocket = await websockets.connect(uri, compression=None)
+                await websocket.send(self.create_message(self.MSG_REGISTER_PEER, my_uri))
+                async for message in websocket:
+                    await self.handle_message(message, websocket)
+                return
+            except Exception as e:
+                logger.error(f"Failed to register with boot node: {e}, retry {attempt + 1}/{self.max_retries}")
+                await asyncio.sleep(self.retry_delay(attempt))
+        logger.error(f"Max retries reached for boot node {uri}")
 
-    async def connect_to_peer(self, uri, retries=0):
+    async def connect_to_peer(self, uri):
         """Connect to a peer node."""
-        if uri in self.peer_nodes or retries >= self.max_retries:
-            if retries >= self.max_retries:
-                logger.info(f"Max retries reached for peer {uri}, removing from known peers")
-                self.known_peers.discard(uri)
-                self.save_peers()
-            return
-        try:
-            websocket = await websockets.connect(uri)
-            self.peer_nodes[uri] = websocket
-            logger.info(f"Connected to peer {uri}")
+        for attempt in range(self.max_retries):
+            if uri in self.peer_nodes:
+                return
             try:
-                await websocket.send(self.create_message(self.MSG_REQUEST_CHAIN_LENGTH, None))
-                if not self.tx_pool_syncing and time.time() - self.last_tx_pool_request > self.tx_pool_request_cooldown:
-                    self.tx_pool_syncing = True
-                    await websocket.send(self.create_message(self.MSG_REQUEST_TX_POOL, None))
-                    self.last_tx_pool_request = time.time()
-            except Exception as e:
-                logger.error(f"Failed to send requests to {uri}: {e}")
-                await self.remove_peer(uri)
+                websocket = await websockets.connect(uri, compression=None)
+                self.add_peer(uri, websocket)
+                logger.info(f"Connected to peer {uri}")
+                try:
+                    await websocket.send(self.create_message(self.MSG_REQUEST_CHAIN_LENGTH, None))
+                    if not self.tx_pool_syncing and time.time() - self.last_tx_pool_request > self.tx_pool_request_cooldown:
+                        self.tx_pool_syncing = True
+                        await websocket.send(self.create_message(self.MSG_REQUEST_TX_POOL, None))
+                        self.last_tx_pool_request = time.time()
+                except Exception as e:
+                    logger.error(f"Failed to send requests to {uri}: {e}")
+                    await self.remove_peer(uri)
+                    return
+                async for message in websocket:
+                    await self.handle_message(message, websocket)
                 return
-            async for message in websocket:
-                await self.handle_message(message, websocket)
-        except ConnectionClosedError:
-            logger.warning(f"Connection closed by peer {uri}")
-            await self.remove_peer(uri)
-            await asyncio.sleep(10)
-            await self.connect_to_peer(uri, retries + 1)
-        except Exception as e:
-            logger.error(f"Failed to connect to {uri}: {e}, retry {retries + 1}/{self.max_retries}")
-            await asyncio.sleep(10)
-            await self.connect_to_peer(uri, retries + 1)
+            except ConnectionClosedError:
+                logger.warning(f"Connection closed by peer {uri}")
+                await self.remove_peer(uri)
+            except Exception as e:
+                logger.error(f"Failed to connect to {uri}: {e}, retry {attempt + 1}/{self.max_retries}")
+            await asyncio.sleep(self.retry_delay(attempt))
+        logger.info(f"Max retries reached for peer {uri}, removing from known peers")
+        self.known_peers.discard(uri)
+        self.peers_dirty = True
 
     async def start_server(self):
         """Start the WebSocket server."""
-        self.server = await websockets.serve(self.connection_handler, "0.0.0.0", self.websocket_port)
+        # Messages are gzipped once in create_message, so per-connection permessage-deflate
+        # would only spend CPU recompressing the same bytes for every peer
+        self.server = await websockets.serve(self.connection_handler, "0.0.0.0", self.websocket_port, compression=None)
         logger.info(f"WebSocket server started at port {self.websocket_port}")
+        self.spawn(self.flush_peers())
+        self.spawn(self.discovery_loop())
         await self.sync_with_peers()  # Sync with peers on startup
         return self.server
 
     async def broadcast_transaction(self, transaction):
         """Broadcast a transaction to all peers."""
-        message = self.create_message(self.MSG_NEW_TX, transaction.to_json())
+        message = self.transaction_message(transaction)
         await self.broadcast(message)
 
     def broadcast_transaction_sync(self, transaction):
-        """Broadcast a transaction to all peers synchronously."""
+        """Schedule a transaction broadcast on the P2P loop without waiting for it."""
         if self.loop:
             future = asyncio.run_coroutine_threadsafe(self.broadcast_transaction(transaction), self.loop)
-            future.result()
-            logger.info(f"Broadcasted transaction {transaction.id}")
+
+            def log_result(done):
+                if done.exception() is not None:
+                    logger.error(f"Failed to broadcast transaction {transaction.id}: {done.exception()}")
+                else:
+                    logger.info(f"Broadcasted transaction {transaction.id}")
+
+            future.add_done_callback(log_result)
         else:
             logger.error("Event loop not available for broadcasting")
 
     async def broadcast_block(self, block):
         """Broadcast a block to all peers."""
-        message = self.create_message(self.MSG_NEW_BLOCK, block.to_json())
+        message = self.create_encoded_message(self.MSG_NEW_BLOCK, block.to_json_bytes())
         await self.broadcast(message)
 
     def broadcast_block_sync(self, block):
-        """Broadcast a block to all peers synchronously."""
+        """Schedule a block broadcast on the P2P loop without waiting for it."""
         if self.loop:
             future = asyncio.run_coroutine_threadsafe(self.broadcast_block(block), self.loop)
-            future.result()
-            logger.info(f"Broadcasted block {block.hash}")
+
+            def log_result(done):
+                if done.exception() is not None:
+                    logger.error(f"Failed to broadcast block {block.hash}: {done.exception()}")
+                else:
+                    logger.info(f"Broadcasted block {block.hash}")
+
+            future.add_done_callback(log_result)
         else:
             logger.error("Event loop not available for broadcasting")
 
     async def run_peer_discovery(self):
         """Run peer discovery logic."""
         logger.info("Starting peer discovery...")
-        if self.my_uri != self.boot_node_uri:
-            asyncio.create_task(self.register_with_boot_node(self.boot_node_uri, self.my_uri))
+        if self.my_uri != self.boot_node_uri and (self.boot_node_task is None or self.boot_node_task.done()):
+            self.boot_node_task = self.spawn(self.register_with_boot_node(self.boot_node_uri, self.my_uri))
         known_peers = self.load_peers()
         for peer_uri in known_peers:
             if peer_uri != self.my_uri and peer_uri != self.node_id:
-                asyncio.create_task(self.connect_to_peer(peer_uri))
+                self.spawn(self.connect_to_peer(peer_uri))
+
+    async def discovery_loop(self):
+        """Repeat peer discovery periodically, so a failed bootstrap or lost peers are recovered."""
+        while True:
+            await asyncio.sleep(self.discovery_interval)
+            try:
+                await self.run_peer_discovery()
+            except Exception as e:
+                logger.error(f"Error during periodic peer discovery: {e}")
 
     def start_websocket_server(self):
         """Start the WebSocket server and peer discovery."""
@@ -0,0 +1,74 @@
+import hashlib
+import math
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over string keys."""
+
+    def __init__(self, capacity, error_rate):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def positions(self, key):
+        """Derive the bit positions for a key from a single digest."""
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        m = self.num_bits
+        h1 = int.from_bytes(digest[:8], 'little') % m
+        h2 = int.from_bytes(digest[8:], 'little') % m
+        positions = []
+        # Enhanced double hashing: the growing increment keeps probe sequences
+        # from cycling when h2 shares a factor with the filter size
+        for i in range(self.num_hashes):
+            positions.append(h1)
+            h1 = (h1 + h2) % m
+            h2 = (h2 + i + 1) % m
+        return positions
+
+    def add(self, key):
+        bits = self.bits
+        for pos in self.positions(key):
+            bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        bits = self.bits
+        return all(bits[pos >> 3] & (1 << (pos & 7)) for pos in self.positions(key))
+
+
+class RotatingBloomFilter:
+    """Two-generation Bloom filter whose oldest keys age out.
+
+    Once the current generation has taken `capacity` keys it becomes the
+    previous one and a fresh generation starts, so memory stays bounded and
+    the false-positive rate stays near 2 * error_rate on long-running nodes.
+    """
+
+    def __init__(self, capacity, error_rate):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.current = BloomFilter(capacity, error_rate)
+        self.previous = None
+
+    def add(self, key):
+        if self.current.count >= self.capacity:
+            self.previous = self.current
+            self.current = BloomFilter(self.capacity, self.error_rate)
+        self.current.add(key)
+
+    def __contains__(self, key):
+        return key in self.current or (self.previous is not None and key in self.previous)
+
+
+def main():
+    seen = RotatingBloomFilter(capacity=1000, error_rate=1e-6)
+    for i in range(1500):
+        seen.add(f"tx-{i}")
+    print(all(f"tx-{i}" in seen for i in range(1000, 1500)))
+    print(sum(f"other-{i}" in seen for i in range(100000)))
+
+if __name__ == '__main__':
+    main()
@@ -6,15 +6,36 @@ import json
 
 def crypto_hash(*args):
 
+    return crypto_hash_raw(*args).hex()
+
+
+def crypto_hash_raw(*args):
+    # The 32-byte SHA-256 digest behind crypto_hash, for callers that don't need the hex form
+
     stringified_args = sorted(map(lambda data: json.dumps(data) ,args))
 
     joinined_args = ''.join(stringified_args)
 
-    return hashlib.sha256(joinined_args.encode('utf-8')).hexdigest()
+    return hashlib.sha256(joinined_args.encode('utf-8')).digest()
+
+
+def stringify_args(*args):
+    # The per-argument strings crypto_hash sorts and joins, for arguments that stay fixed
+    # across many hashes (a block's data while its nonce is searched)
+    return [json.dumps(data) for data in args]
+
+
+def crypto_hash_raw_with(stringified_args, *args):
+    # crypto_hash_raw(*fixed_args, *args) given stringify_args(*fixed_args): identical digest,
+    # but only the varying arguments are serialized again
+    joinined_args = ''.join(sorted(stringified_args + [json.dumps(data) for data in args]))
+
+    return hashlib.sha256(joinined_args.encode('utf-8')).digest()
 
 
 def main():
     print(crypto_hash('three',[79],{1:40},'one',2))
+    print(crypto_hash_raw_with(stringify_args('three',[79],{1:40}),'one',2).hex())
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
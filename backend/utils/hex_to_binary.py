@@ -1,29 +1,20 @@
-HEX_TO_BINARY_CONVERSION_TABLE = {
-    '0': '0000',
-    '1': '0001',
-    '2': '0010',
-    '3': '0011',
-    '4': '0100',
-    '5': '0101',
-    '6': '0110',
-    '7': '0111',
-    '8': '1000',
-    '9': '1001',
-    'a': '1010',
-    'b': '1011',
-    'c': '1100',
-    'd': '1101',
-    'e': '1110',
-    'f': '1111'
-}
-
 def hex_to_binary(hex_str):
-    binart_str = ''
-
-    for char in hex_str:
-        binart_str+=HEX_TO_BINARY_CONVERSION_TABLE[char]
-
-    return binart_str
+    # One C-level parse and format instead of a table lookup and string concat per hex digit;
+    # the width keeps the leading zeros that proof-of-work checks count
+    if not hex_str:
+        return ''
+    return format(int(hex_str, 16), f'0{len(hex_str) * 4}b')
+
+def leading_zero_bits_ok(hex_hash, difficulty):
+    # Same answer as hex_to_binary(hex_hash)[:difficulty] == '0' * difficulty without building
+    # the bit string: the top `difficulty` bits are zero iff shifting the rest away leaves zero
+    bits = len(hex_hash) * 4
+    return difficulty <= bits and int(hex_hash, 16) >> (bits - difficulty) == 0
+
+def digest_meets_difficulty(digest, difficulty):
+    # leading_zero_bits_ok for a raw digest, so the mining loop never hex-encodes failed attempts
+    bits = len(digest) * 8
+    return difficulty <= bits and int.from_bytes(digest, 'big') >> (bits - difficulty) == 0
 
 def main():
     n = 451
@@ -34,6 +25,8 @@ def main():
 
     print(int(binary_number,2))
 
+    print(leading_zero_bits_ok('0f' + 'f' * 62, 4), leading_zero_bits_ok('0f' + 'f' * 62, 5))
+
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,85 @@
+import json
+from typing import Any
+
+import msgspec
+import orjson
+
+
+# orjson only handles 64-bit integers: it refuses wider ones when encoding and
+# silently rounds them to floats when decoding. ECDSA signatures are stored as
+# 256-bit integers, so payloads carrying them are encoded by the stdlib instead
+# and every payload is decoded by msgspec, which keeps integers exact.
+
+def encode_json(data) -> bytes:
+    try:
+        return orjson.dumps(data)
+    except orjson.JSONEncodeError:
+        return json.dumps(data).encode('utf-8')
+
+
+def decode_json(raw):
+    # Decoded with msgspec rather than orjson: a compact payload can still carry
+    # wide integers (msgspec-encoded blocks do), and orjson would round them
+    return msgspec.json.decode(raw)
+
+
+class Envelope(msgspec.Struct):
+    """Wire shape of every P2P message."""
+    type: str
+    data: Any = None
+    sender: str = msgspec.field(default='unknown', name='from')
+
+
+# msgspec handles arbitrary-precision integers in both directions, so envelopes
+# need no stdlib fallback; one typed decoder validates the shape while parsing
+_message_encoder = msgspec.json.Encoder()
+_message_decoder = msgspec.json.Decoder(Envelope)
+
+
+def encode_message(msg_type, data, sender) -> bytes:
+    return _message_encoder.encode(Envelope(type=msg_type, data=data, sender=sender))
+
+
+def decode_message(raw) -> Envelope:
+    return _message_decoder.decode(raw)
+
+
+class BlockStruct(msgspec.Struct):
+    """Fixed shape of a serialized block, mirroring Block.to_json."""
+    timestamp: int
+    last_hash: str
+    hash: str
+    data: list
+    difficulty: int
+    nonce: int
+    height: int
+    version: int
+    merkle_root: str
+    tx_count: int
+
+
+# Built once for the known block shape, so encoding walks struct fields in order
+# instead of dispatching on every key of a generic dict
+_block_encoder = msgspec.json.Encoder()
+
+
+def encode_block(block_json) -> bytes:
+    return _block_encoder.encode(BlockStruct(**block_json))
+
+
+def main():
+    payload = {'signature': [2 ** 255, 3], 'amount': 1.5}
+    assert decode_json(encode_json(payload)) == payload
+    assert decode_json(msgspec.json.encode(payload)) == payload
+    assert decode_json(encode_json(payload).decode('utf-8')) == payload
+    print(encode_json({'type': 'PING', 'data': None}))
+    message = decode_message(encode_message('PING', payload, 'node-1'))
+    assert (message.type, message.data, message.sender) == ('PING', payload, 'node-1')
+    block_json = {
+        'timestamp': 1, 'last_hash': 'a', 'hash': 'b', 'data': [payload], 'difficulty': 3,
+        'nonce': 0, 'height': 0, 'version': 1, 'merkle_root': 'c', 'tx_count': 1
+    }
+    assert msgspec.json.decode(encode_block(block_json)) == block_json
+
+if __name__ == '__main__':
+    main()
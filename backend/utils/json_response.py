@@ -0,0 +1,19 @@
+from typing import Any
+
+from fastapi.responses import ORJSONResponse
+
+from utils.json_codec import encode_json
+
+
+class CodecJSONResponse(ORJSONResponse):
+    """ORJSONResponse that falls back to the stdlib for 256-bit signature integers."""
+
+    def render(self, content: Any) -> bytes:
+        return encode_json(content)
+
+
+def main():
+    print(CodecJSONResponse({'signature': [2 ** 255, 3], 'amount': 1.5}).body)
+
+if __name__ == '__main__':
+    main()